@@ -0,0 +1,103 @@
+"""ledger monthly partitions
+
+Revision ID: 8e4b2d7f1a93
+Revises: 3c8f1e9a6b52
+Create Date: 2026-10-18 15:20:41.330915
+
+Recreates ``ledger`` as a table range-partitioned by month on ``created_at`` and
+moves the existing rows into it. Months already compacted into
+``ledger_monthly_rollup`` cannot be restored by the downgrade.
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b2d7f1a93'
+down_revision: Union[str, None] = '3c8f1e9a6b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+LEDGER_COLUMNS = "id, user_id, delta, reason, meta, created_at, updated_at"
+
+
+def _ledger_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('ledger_id_seq')"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=False),
+        sa.Column('meta', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    ]
+
+
+def _add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE ledger RENAME TO ledger_unpartitioned")
+    op.execute("ALTER TABLE ledger_unpartitioned RENAME CONSTRAINT ledger_pkey TO ledger_unpartitioned_pkey")
+    op.drop_index('ix_ledger_user_id_id', table_name='ledger_unpartitioned')
+
+    op.create_table('ledger',
+    *_ledger_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.execute("ALTER SEQUENCE ledger_id_seq OWNED BY ledger.id")
+    op.execute("CREATE TABLE ledger_default PARTITION OF ledger DEFAULT")
+
+    today = datetime.datetime.now(datetime.UTC).date()
+    first_entry = op.get_bind().execute(sa.text("SELECT min(created_at) FROM ledger_unpartitioned")).scalar()
+    month = (first_entry.date() if first_entry else today).replace(day=1)
+    last = _add_months(today.replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE ledger_{month:%Y_%m} PARTITION OF ledger "
+            f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+
+    op.execute(f"INSERT INTO ledger ({LEDGER_COLUMNS}) SELECT {LEDGER_COLUMNS} FROM ledger_unpartitioned")
+    op.drop_table('ledger_unpartitioned')
+    op.create_index('ix_ledger_user_id_id', 'ledger', ['user_id', sa.text('id DESC')], unique=False)
+
+    op.create_table('ledger_monthly_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('reason', sa.String(), nullable=False),
+    sa.Column('delta', sa.BigInteger(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'reason')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ledger_monthly_rollup')
+
+    op.drop_index('ix_ledger_user_id_id', table_name='ledger')
+    op.execute("ALTER TABLE ledger RENAME TO ledger_partitioned")
+    op.execute("ALTER TABLE ledger_partitioned RENAME CONSTRAINT ledger_pkey TO ledger_partitioned_pkey")
+
+    op.create_table('ledger',
+    *_ledger_columns(),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("ALTER SEQUENCE ledger_id_seq OWNED BY ledger.id")
+    op.execute(f"INSERT INTO ledger ({LEDGER_COLUMNS}) SELECT {LEDGER_COLUMNS} FROM ledger_partitioned")
+    # Dropping the partitioned table drops all of its partitions
+    op.drop_table('ledger_partitioned')
+    op.create_index('ix_ledger_user_id_id', 'ledger', ['user_id', sa.text('id DESC')], unique=False)
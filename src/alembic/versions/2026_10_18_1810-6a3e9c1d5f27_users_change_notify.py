@@ -0,0 +1,43 @@
+"""users change notify
+
+Revision ID: 6a3e9c1d5f27
+Revises: d41f7a2c9e6b
+Create Date: 2026-10-18 18:10:26.604417
+
+Publishes every updated users row on the ``user_changed`` channel so each bot
+replica can refresh its user cache.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3e9c1d5f27'
+down_revision: Union[str, None] = 'd41f7a2c9e6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE FUNCTION notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('user_changed', row_to_json(NEW)::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER users_notify_changed AFTER UPDATE ON users "
+        "FOR EACH ROW EXECUTE FUNCTION notify_user_changed()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER users_notify_changed ON users")
+    op.execute("DROP FUNCTION notify_user_changed()")
@@ -0,0 +1,47 @@
+"""fsm states change notify
+
+Revision ID: b7d2e4f81c05
+Revises: 6a3e9c1d5f27
+Create Date: 2026-10-19 09:30:12.418230
+
+Publishes every written fsm_states key on the ``fsm_state_changed`` channel, prefixed
+with the writing replica's ``vento.fsm_origin`` setting, so the other replicas can drop
+their cached copy.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f81c05'
+down_revision: Union[str, None] = '6a3e9c1d5f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE FUNCTION notify_fsm_state_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'fsm_state_changed',
+                coalesce(current_setting('vento.fsm_origin', true), '') || ':' || NEW.key
+            );
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER fsm_states_notify_changed AFTER INSERT OR UPDATE ON fsm_states "
+        "FOR EACH ROW EXECUTE FUNCTION notify_fsm_state_changed()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER fsm_states_notify_changed ON fsm_states")
+    op.execute("DROP FUNCTION notify_fsm_state_changed()")
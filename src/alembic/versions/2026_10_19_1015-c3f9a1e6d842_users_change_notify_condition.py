@@ -0,0 +1,40 @@
+"""users change notify condition
+
+Revision ID: c3f9a1e6d842
+Revises: b7d2e4f81c05
+Create Date: 2026-10-19 10:15:47.205913
+
+Only publishes users rows whose cached fields changed, and none while the
+transaction has ``vento.bulk_user_update`` set; bulk jobs send a single reset instead.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a1e6d842'
+down_revision: Union[str, None] = 'b7d2e4f81c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP TRIGGER users_notify_changed ON users")
+    op.execute(
+        "CREATE TRIGGER users_notify_changed AFTER UPDATE ON users "
+        "FOR EACH ROW WHEN ("
+        "(OLD.telegram_id, OLD.username, OLD.balance) IS DISTINCT FROM (NEW.telegram_id, NEW.username, NEW.balance) "
+        "AND current_setting('vento.bulk_user_update', true) IS DISTINCT FROM 'on'"
+        ") EXECUTE FUNCTION notify_user_changed()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER users_notify_changed ON users")
+    op.execute(
+        "CREATE TRIGGER users_notify_changed AFTER UPDATE ON users "
+        "FOR EACH ROW EXECUTE FUNCTION notify_user_changed()"
+    )
@@ -0,0 +1,125 @@
+"""Per-message cost of image intent detection.
+
+Run from ``src``::
+
+    python -m benchmarks.image_intent
+
+Checks that the compiled detector agrees with the reference pattern-by-pattern search
+on the whole corpus, then times both on a mixed corpus and on plain and image messages
+alone. Exits non-zero on a mismatch or if the compiled detector is slower than the
+reference on any of the corpora.
+"""
+import random
+import re
+import sys
+import timeit
+
+from bot.utils.image_intent import IMAGE_EXCLUDE_KEYWORDS, IMAGE_PROMPT_PATTERNS, image_intent_detector
+
+PLAIN_MESSAGES = [
+    "Привет! Как дела?",
+    "Объясни, пожалуйста, разницу между TCP и UDP",
+    "Напиши функцию на Python, которая сортирует список словарей по ключу",
+    "Сколько будет 2+2?",
+    "Переведи на английский: я опаздываю на встречу",
+    "Какие книги почитать по распределённым системам?",
+    "what is the capital of Australia",
+    "Can you review this SQL query: SELECT * FROM users WHERE id = 1",
+    "Составь план тренировок на неделю для новичка",
+    "Почему небо голубое?",
+    "Explain the difference between a process and a thread in simple terms",
+    "Сделай краткое резюме этого текста: " + "Lorem ipsum dolor sit amet. " * 20,
+    "Напомни, как работает сборщик мусора в CPython, и почему есть циклические ссылки",
+    "ok",
+    "спасибо!",
+]
+
+IMAGE_MESSAGES = [
+    "нарисуй кота в космосе",
+    "Нарисуй: закат над морем в стиле Моне",
+    "сгенерируй картинку с драконом",
+    "создай изображение футуристического города",
+    "хочу увидеть картинку горного озера",
+    "покажи мне арт с самураем",
+    "изобрази робота-повара",
+    "представь и покажи сцену битвы на Марсе",
+    "draw me a cyberpunk fox",
+    "generate an image of a lighthouse at night",
+    "make a picture of a cozy cabin",
+    "!draw isometric island",
+]
+
+TRICKY_MESSAGES = [
+    "опиши словами, как нарисовать кота",
+    "расскажи, что ты хочешь",
+    "Хочу понять, как работает asyncio",
+    "Покажи пример кода на Go",
+    "create a REST API in FastAPI",
+    "How do I make money online?",
+    "хочу нарисуй кота",
+]
+
+
+def reference(text: str) -> str | None:
+    if any(kw in text.lower() for kw in IMAGE_EXCLUDE_KEYWORDS):
+        return None
+    for pattern in IMAGE_PROMPT_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return next((g for g in match.groups() if g), None)
+    return None
+
+
+def compiled(text: str) -> str | None:
+    intent = image_intent_detector.detect(text)
+    return intent.prompt if intent else None
+
+
+def build_corpus(size: int = 10_000, image_share: float = 0.05, seed: int = 42) -> list[str]:
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        roll = rnd.random()
+        if roll < image_share:
+            corpus.append(rnd.choice(IMAGE_MESSAGES))
+        elif roll < image_share * 2:
+            corpus.append(rnd.choice(TRICKY_MESSAGES))
+        else:
+            corpus.append(rnd.choice(PLAIN_MESSAGES))
+    return corpus
+
+
+def per_message_ns(func, corpus: list[str], repeat: int = 5) -> float:
+    timer = timeit.Timer(lambda: [func(text) for text in corpus])
+    return min(timer.repeat(repeat=repeat, number=1)) / len(corpus) * 1e9
+
+
+def main() -> int:
+    mismatches = [
+        text for text in PLAIN_MESSAGES + IMAGE_MESSAGES + TRICKY_MESSAGES
+        if reference(text) != compiled(text)
+    ]
+    for text in mismatches:
+        print(f"MISMATCH {text!r}: reference={reference(text)!r} compiled={compiled(text)!r}")
+
+    corpora = {
+        "mixed": build_corpus(),
+        "plain": PLAIN_MESSAGES * 200,
+        "image": IMAGE_MESSAGES * 200,
+    }
+    regressions = []
+    for name, corpus in corpora.items():
+        reference_ns = per_message_ns(reference, corpus)
+        compiled_ns = per_message_ns(compiled, corpus)
+        print(f"reference/{name:<10} {reference_ns:>10.0f} ns/message")
+        print(f"compiled/{name:<11} {compiled_ns:>10.0f} ns/message")
+        if compiled_ns > reference_ns:
+            regressions.append(name)
+
+    for name in regressions:
+        print(f"REGRESSION: compiled detector is slower than the reference search on {name} messages")
+    return 1 if mismatches or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
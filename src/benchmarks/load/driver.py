@@ -0,0 +1,229 @@
+"""Synthetic users fed through the real dispatcher, router and middlewares."""
+import asyncio
+import itertools
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+from benchmarks.image_intent import IMAGE_MESSAGES, PLAIN_MESSAGES
+from benchmarks.load.stubs import TelegramStub
+
+# users.telegram_id is a 32-bit column; stay clear of real ids and of the benchmark's negative ones
+TELEGRAM_ID_BASE = 2_000_000_000
+TOP_UP = 1_000_000
+CALLBACKS = ("goto:account", "goto:switch")
+
+
+@dataclass(frozen=True)
+class Mix:
+    """Relative weights of the update kinds a user in GPT mode sends."""
+
+    text: int = 70
+    photo: int = 10
+    voice: int = 10
+    callback: int = 10
+
+    @classmethod
+    def parse(cls, value: str) -> "Mix":
+        weights = {}
+        for part in value.split(","):
+            kind, _, weight = part.partition("=")
+            weights[kind.strip()] = int(weight)
+        return cls(**weights)
+
+    def choose(self, rnd: random.Random) -> str:
+        kinds = ("text", "photo", "voice", "callback")
+        return rnd.choices(kinds, weights=[getattr(self, kind) for kind in kinds])[0]
+
+
+class CompletionMiddleware(BaseMiddleware):
+    """Outermost update middleware: resolves the driver's future once an update is done."""
+
+    def __init__(self) -> None:
+        self.pending: dict[int, asyncio.Future[None]] = {}
+        self.errors: Counter[str] = Counter()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        future = self.pending.pop(event.update_id, None) if isinstance(event, Update) else None
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            self.errors[type(e).__name__] += 1
+            raise
+        finally:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+
+@dataclass
+class Report:
+    duration: float = 0.0
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    statements: int = 0
+    timeouts: int = 0
+
+    @property
+    def updates(self) -> int:
+        return sum(len(samples) for samples in self.latencies.values())
+
+    @staticmethod
+    def percentile(samples: list[float], p: float) -> float:
+        # Nearest rank, so every reported value is a latency that was actually observed
+        ordered = sorted(samples)
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    def rows(self) -> list[tuple[str, int, float, float, float]]:
+        groups = {"all": [s for samples in self.latencies.values() for s in samples], **self.latencies}
+        return [
+            (kind, len(samples), *(self.percentile(samples, p) for p in (50, 95, 99)))
+            for kind, samples in groups.items()
+            if samples
+        ]
+
+
+class LoadDriver:
+    """Closed-loop synthetic users: each sends an update, waits for the bot to finish
+    handling it, thinks for an exponentially distributed time and sends the next one.
+
+    Every user first registers with ``/start``, gets topped up directly in the database
+    so the run never hits the insufficient balance path, and picks GPT-5 or DALL·E 3.
+    Only updates sent after that setup are measured.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        telegram: TelegramStub,
+        top_up: Callable[[int, int], Awaitable[None]],
+        users: int,
+        mix: Mix,
+        dalle_share: float,
+        think: float,
+        timeout: float = 300.0,
+        seed: int = 42,
+    ):
+        self._dp = dp
+        self._telegram = telegram
+        self._top_up = top_up
+        self._users = users
+        self._mix = mix
+        self._dalle_share = dalle_share
+        self._think = think
+        self._timeout = timeout
+        self._rnd = random.Random(seed)
+        self._update_ids = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._measuring = False
+        self.completion = CompletionMiddleware()
+        self.report = Report()
+        # Registered before anything else, so it wraps the whole middleware stack
+        dp.update.outer_middleware(self.completion)
+
+    async def setup(self) -> list[tuple[int, str]]:
+        users = []
+        for i in range(self._users):
+            mode = "dalle" if self._rnd.random() < self._dalle_share else "chatgpt"
+            users.append((TELEGRAM_ID_BASE + i, mode))
+
+        async def prepare(telegram_id: int, mode: str) -> None:
+            await self._send(telegram_id, "start", self._message(telegram_id, text="/start", entities=[
+                {"type": "bot_command", "offset": 0, "length": 6},
+            ]))
+            await self._top_up(telegram_id, TOP_UP)
+            await self._send(telegram_id, "callback", self._callback(telegram_id, f"set_mode:{mode}"))
+
+        await asyncio.gather(*(prepare(telegram_id, mode) for telegram_id, mode in users))
+        return users
+
+    async def run(self, users: list[tuple[int, str]], duration: float) -> Report:
+        self._measuring = True
+        self.completion.errors.clear()
+        deadline = time.perf_counter() + duration
+        started_at = time.perf_counter()
+        await asyncio.gather(*(self._user_loop(telegram_id, mode, deadline) for telegram_id, mode in users))
+        self.report.duration = time.perf_counter() - started_at
+        return self.report
+
+    async def _user_loop(self, telegram_id: int, mode: str, deadline: float) -> None:
+        rnd = random.Random(telegram_id)
+        # Spread the first updates so the users do not arrive in lockstep
+        await asyncio.sleep(rnd.uniform(0, self._think))
+        while time.perf_counter() < deadline:
+            kind = self._mix.choose(rnd)
+            if mode == "dalle" and kind in ("photo", "voice"):
+                kind = "text"
+            await self._send(telegram_id, kind, self._update(telegram_id, kind, mode, rnd))
+            if self._think:
+                await asyncio.sleep(rnd.expovariate(1 / self._think))
+
+    def _update(self, telegram_id: int, kind: str, mode: str, rnd: random.Random) -> dict[str, Any]:
+        match kind:
+            case "text":
+                text = rnd.choice(IMAGE_MESSAGES if mode == "dalle" else PLAIN_MESSAGES)
+                return self._message(telegram_id, text=text)
+            case "photo":
+                n = next(self._ids)
+                photo = {"file_id": f"photo-{n}", "file_unique_id": f"photo-{n}", "width": 1280, "height": 960}
+                return self._message(telegram_id, photo=[photo], caption="Что на этой картинке?")
+            case "voice":
+                n = next(self._ids)
+                voice = {"file_id": f"voice-{n}", "file_unique_id": f"voice-{n}", "duration": 5, "mime_type": "audio/ogg"}
+                return self._message(telegram_id, voice=voice)
+            case _:
+                return self._callback(telegram_id, rnd.choice(CALLBACKS))
+
+    async def _send(self, telegram_id: int, kind: str, payload: dict[str, Any]) -> None:
+        update_id = next(self._update_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.completion.pending[update_id] = future
+        started_at = time.perf_counter()
+        self._telegram.push_update({"update_id": update_id, **payload})
+        try:
+            await asyncio.wait_for(future, self._timeout)
+        except asyncio.TimeoutError:
+            self.completion.pending.pop(update_id, None)
+            if self._measuring:
+                self.report.timeouts += 1
+            return
+        if self._measuring:
+            self.report.latencies[kind].append(time.perf_counter() - started_at)
+
+    @staticmethod
+    def _user(telegram_id: int) -> dict[str, Any]:
+        n = telegram_id - TELEGRAM_ID_BASE
+        return {"id": telegram_id, "is_bot": False, "first_name": f"Load {n}", "username": f"load_{n}", "language_code": "ru"}
+
+    def _message(self, telegram_id: int, **fields: Any) -> dict[str, Any]:
+        return {
+            "message": {
+                "message_id": next(self._ids),
+                "date": int(time.time()),
+                "chat": {"id": telegram_id, "type": "private", "first_name": "Load"},
+                "from": self._user(telegram_id),
+                **fields,
+            },
+        }
+
+    def _callback(self, telegram_id: int, data: str) -> dict[str, Any]:
+        message = self._message(telegram_id, text="👇 Выбери нужный ИИ:")["message"]
+        message["from"] = {"id": 1, "is_bot": True, "first_name": "Vento"}
+        return {
+            "callback_query": {
+                "id": str(next(self._ids)),
+                "from": self._user(telegram_id),
+                "chat_instance": "load",
+                "data": data,
+                "message": message,
+            },
+        }
@@ -0,0 +1,237 @@
+"""Local stand-ins for the Telegram Bot API and the OpenAI API."""
+import asyncio
+import itertools
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from aiohttp import web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Vento", "username": "vento_load_bot"}
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Log-normal delay given by its median and 99th percentile, in seconds."""
+
+    median: float
+    p99: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Latency":
+        median, _, p99 = value.partition(":")
+        return cls(float(median), float(p99 or median))
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        sigma = max(math.log(self.p99 / self.median), 0.0) / 2.326
+        return random.lognormvariate(math.log(self.median), sigma)
+
+    async def wait(self) -> None:
+        if delay := self.sample():
+            await asyncio.sleep(delay)
+
+
+class StubServer:
+    def __init__(self) -> None:
+        self.app = web.Application(client_max_size=64 * 1024 * 1024)
+        self.calls: Counter[str] = Counter()
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=host, port=port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class TelegramStub(StubServer):
+    """Bot API emulation: updates are queued by the driver and served to ``getUpdates``.
+
+    Only the methods the bot uses are meaningful; any other method returns ``True``.
+    Downloads under ``/file`` return ``file_size`` bytes of noise.
+    """
+
+    def __init__(self, latency: Latency, file_size: int = 64 * 1024):
+        super().__init__()
+        self._latency = latency
+        self._file_size = file_size
+        self._updates: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._message_ids = itertools.count(1_000_000)
+        self.app.router.add_post("/bot{token}/{method}", self._handle_method)
+        self.app.router.add_get("/file/bot{token}/{path:.+}", self._handle_file)
+
+    def push_update(self, update: dict[str, Any]) -> None:
+        self._updates.put_nowait(update)
+
+    async def _handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params = dict(await request.post())
+        if method == "getUpdates":
+            result = await self._get_updates(params)
+        else:
+            await self._latency.wait()
+            result = self._result(method, params)
+        return web.Response(body=orjson.dumps({"ok": True, "result": result}), content_type="application/json")
+
+    async def _get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        limit = int(params.get("limit") or 100)
+        try:
+            first = await asyncio.wait_for(self._updates.get(), timeout=float(params.get("timeout") or 0) or 0.01)
+        except asyncio.TimeoutError:
+            return []
+        updates = [first]
+        while len(updates) < limit and not self._updates.empty():
+            updates.append(self._updates.get_nowait())
+        return updates
+
+    def _result(self, method: str, params: dict[str, Any]) -> Any:
+        match method:
+            case "getMe":
+                return BOT_USER
+            case "sendMessage" | "editMessageText" | "editMessageReplyMarkup":
+                return self._message(params, text=params.get("text", ""))
+            case "sendPhoto":
+                message_id = next(self._message_ids)
+                photo = {"file_id": f"sent-{message_id}", "file_unique_id": f"sent-{message_id}", "width": 1024, "height": 1024}
+                return self._message(params, message_id=message_id, photo=[photo])
+            case "getFile":
+                file_id = params["file_id"]
+                return {"file_id": file_id, "file_unique_id": file_id, "file_size": self._file_size, "file_path": f"files/{file_id}"}
+            case _:
+                return True
+
+    def _message(self, params: dict[str, Any], message_id: int | None = None, **fields: Any) -> dict[str, Any]:
+        chat_id = int(params.get("chat_id") or 0)
+        return {
+            "message_id": message_id or int(params.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **fields,
+        }
+
+    async def _handle_file(self, request: web.Request) -> web.Response:
+        self.calls["file"] += 1
+        await self._latency.wait()
+        return web.Response(body=random.randbytes(self._file_size), content_type="application/octet-stream")
+
+
+class OpenAIStub(StubServer):
+    """OpenAI emulation for chat completions (plain and streamed), images and transcriptions.
+
+    Each endpoint waits for a sample of its latency before answering; a stream then
+    spreads ``stream_chunks`` chunks over ``stream`` latency. A ``rate_limit_ratio``
+    share of requests is answered with a 429 carrying OpenAI's rate limit headers.
+    """
+
+    def __init__(
+        self,
+        chat: Latency,
+        images: Latency,
+        transcriptions: Latency,
+        stream: Latency,
+        stream_chunks: int = 20,
+        rate_limit_ratio: float = 0.0,
+    ):
+        super().__init__()
+        self._chat = chat
+        self._images = images
+        self._transcriptions = transcriptions
+        self._stream = stream
+        self._stream_chunks = stream_chunks
+        self._rate_limit_ratio = rate_limit_ratio
+        self.rate_limited: Counter[str] = Counter()
+        self.app.router.add_post("/v1/chat/completions", self._handle_chat)
+        self.app.router.add_post("/v1/images/generations", self._handle_images)
+        self.app.router.add_post("/v1/audio/transcriptions", self._handle_transcriptions)
+        self.app.router.add_get("/images/{name}", self._handle_image_file)
+
+    @staticmethod
+    def _headers() -> dict[str, str]:
+        return {
+            "x-ratelimit-limit-requests": "10000",
+            "x-ratelimit-remaining-requests": "9999",
+            "x-ratelimit-limit-tokens": "10000000",
+            "x-ratelimit-remaining-tokens": "9990000",
+        }
+
+    def _rate_limit(self, endpoint: str) -> web.Response | None:
+        if random.random() >= self._rate_limit_ratio:
+            return None
+        self.rate_limited[endpoint] += 1
+        body = {"error": {"message": "Rate limit reached (stub)", "type": "requests", "param": None, "code": "rate_limit_exceeded"}}
+        headers = {
+            **self._headers(),
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "200ms",
+            "retry-after-ms": "200",
+        }
+        return web.Response(status=429, body=orjson.dumps(body), content_type="application/json", headers=headers)
+
+    async def _handle_chat(self, request: web.Request) -> web.StreamResponse:
+        self.calls["chat.completions"] += 1
+        payload = orjson.loads(await request.read())
+        if limited := self._rate_limit("chat.completions"):
+            return limited
+        await self._chat.wait()
+        model = payload.get("model", "gpt-5")
+        completion = {"id": "chatcmpl-stub", "created": int(time.time()), "model": model}
+        if not payload.get("stream"):
+            message = {"role": "assistant", "content": "Краткое содержание беседы."}
+            body = {
+                **completion,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+            }
+            return web.Response(body=orjson.dumps(body), content_type="application/json", headers=self._headers())
+
+        response = web.StreamResponse(headers={**self._headers(), "Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        pause = self._stream.sample() / max(self._stream_chunks, 1)
+        for i in range(self._stream_chunks + 1):
+            last = i == self._stream_chunks
+            choice = {"index": 0, "delta": {} if last else {"content": f"слово{i} "}, "finish_reason": "stop" if last else None}
+            chunk = {**completion, "object": "chat.completion.chunk", "choices": [choice]}
+            await response.write(b"data: " + orjson.dumps(chunk) + b"\n\n")
+            if not last and pause:
+                await asyncio.sleep(pause)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _handle_images(self, request: web.Request) -> web.Response:
+        self.calls["images.generate"] += 1
+        await request.read()
+        if limited := self._rate_limit("images.generate"):
+            return limited
+        await self._images.wait()
+        body = {"created": int(time.time()), "data": [{"url": f"{self.url}/images/{random.getrandbits(64):x}.png"}]}
+        return web.Response(body=orjson.dumps(body), content_type="application/json", headers=self._headers())
+
+    async def _handle_transcriptions(self, request: web.Request) -> web.Response:
+        self.calls["audio.transcriptions"] += 1
+        await request.read()
+        if limited := self._rate_limit("audio.transcriptions"):
+            return limited
+        await self._transcriptions.wait()
+        body = {"text": "Расскажи, как работает асинхронность в Python"}
+        return web.Response(body=orjson.dumps(body), content_type="application/json", headers=self._headers())
+
+    async def _handle_image_file(self, request: web.Request) -> web.Response:
+        return web.Response(body=random.randbytes(1024), content_type="image/png")
@@ -0,0 +1,118 @@
+"""Admission order and overhead of the OpenAI rate limiter.
+
+Run from ``src``::
+
+    python -m benchmarks.rate_limiter
+
+Checks that a paused shared lane admits a GPT-5 waiter before a gpt-5-mini waiter that
+queued earlier, and that 429s are retried after the pause until ``max_retries`` runs
+out. Then times uncontended ``acquire`` calls. Exits non-zero if a check fails.
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+from openai import RateLimitError
+
+from bot.enums import OpenAIPriorityEnum
+from bot.errors import OpenAIRateLimitedError
+from bot.services.rate_limiter import OpenAIRateLimiter
+from bot.settings import ModelRateLimit
+
+ITERATIONS = 100_000
+PAUSE = 0.05
+MAX_RETRIES = 2
+
+LIMITS = {
+    "gpt-5": ModelRateLimit(RPM=10**9, TPM=10**12),
+    "gpt-5-mini": ModelRateLimit(SHARED_WITH="gpt-5"),
+}
+
+
+async def admission_order() -> list[str]:
+    limiter = OpenAIRateLimiter(LIMITS)
+    # 429s pause the capacity both models share, the later and longer one wins; with
+    # separate queues the mini waiter would be let through after the first pause
+    limiter.observe("gpt-5-mini", {"retry-after": str(PAUSE)}, rate_limited=True)
+    limiter.observe("gpt-5", {"retry-after": str(PAUSE * 2)}, rate_limited=True)
+    admitted: list[str] = []
+
+    async def caller(model: str, priority: OpenAIPriorityEnum) -> None:
+        await limiter.acquire(model, tokens=100, priority=priority)
+        admitted.append(model)
+
+    mini = asyncio.create_task(caller("gpt-5-mini", OpenAIPriorityEnum.normal))
+    await asyncio.sleep(0)
+    gpt5 = asyncio.create_task(caller("gpt-5", OpenAIPriorityEnum.high))
+    await asyncio.gather(mini, gpt5)
+    return admitted
+
+
+class _Response:
+    headers: dict[str, str] = {}
+
+    def parse(self) -> str:
+        return "ok"
+
+
+def _rate_limited() -> RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": str(PAUSE * 1000)}, request=request)
+    return RateLimitError("Rate limit reached", response=response, body=None)
+
+
+async def retries(failures: int) -> tuple[int, str]:
+    """Calls made and the outcome of a request that is rate limited ``failures`` times."""
+    limiter = OpenAIRateLimiter(LIMITS, max_retries=MAX_RETRIES)
+    calls = 0
+
+    async def request() -> _Response:
+        nonlocal calls
+        calls += 1
+        if calls <= failures:
+            raise _rate_limited()
+        return _Response()
+
+    try:
+        outcome = await limiter.call("gpt-5", 100, OpenAIPriorityEnum.high, request)
+    except OpenAIRateLimitedError:
+        outcome = "rate limited"
+    return calls, outcome
+
+
+async def acquire_ns() -> float:
+    limiter = OpenAIRateLimiter(LIMITS)
+    started_at = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await limiter.acquire("gpt-5", tokens=100)
+    return (time.perf_counter() - started_at) / ITERATIONS * 1e9
+
+
+async def run() -> int:
+    failed = False
+    order = await admission_order()
+    print(f"admitted after pause      {' -> '.join(order)}")
+    if order != ["gpt-5", "gpt-5-mini"]:
+        print("WRONG ORDER: GPT-5 must be admitted before the earlier gpt-5-mini waiter")
+        failed = True
+
+    for failures, expected in ((MAX_RETRIES, (MAX_RETRIES + 1, "ok")), (MAX_RETRIES + 1, (MAX_RETRIES + 1, "rate limited"))):
+        started_at = time.perf_counter()
+        outcome = await retries(failures)
+        elapsed = time.perf_counter() - started_at
+        print(f"{failures} x 429                   {outcome[1]} after {outcome[0]} calls in {elapsed:.2f}s")
+        if outcome != expected or elapsed < PAUSE * MAX_RETRIES:
+            print(f"WRONG RETRIES: expected {expected[1]} after {expected[0]} calls, each retry after the pause")
+            failed = True
+
+    print(f"uncontended acquire       {await acquire_ns():>8.0f} ns")
+    return 1 if failed else 0
+
+
+def main() -> int:
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Per-row cost of turning query results into entities.
+
+Run from ``src``::
+
+    python -m benchmarks.row_mapping
+
+Loads users, ledger entries and prices into an in-memory SQLite database and reads
+them back twice: the ORM way repositories used to (``select(Orm)``, a fresh data
+mapper per row, ``model_validate(from_attributes=True)``) and the current way (Core
+column selects mapped through a prebuilt ``RowMapper``). Exits non-zero if the two
+disagree or if the row mapper is slower.
+"""
+import sys
+import timeit
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from bot.database.models import Base, LedgerOrm, PriceOrm, UserOrm
+from bot.repos.ledger import LedgerDataMapper, ledger_row
+from bot.repos.model_price import PriceDataMapper, price_row
+from bot.repos.user import UserDataMapper, user_row
+
+ROWS = 5_000
+
+CASES = [
+    (UserOrm, UserDataMapper, user_row),
+    (LedgerOrm, LedgerDataMapper, ledger_row),
+    (PriceOrm, PriceDataMapper, price_row),
+]
+
+
+def seed(session: Session) -> None:
+    now = datetime.now()
+    session.execute(insert(UserOrm), [
+        {"id": i, "telegram_id": 10_000 + i, "username": f"user{i}", "balance": i, "created_at": now, "updated_at": now}
+        for i in range(1, ROWS + 1)
+    ])
+    session.execute(insert(LedgerOrm), [
+        {"id": i, "user_id": i % 100, "delta": -i, "reason": "gpt-4o", "meta": None, "created_at": now, "updated_at": now}
+        for i in range(1, ROWS + 1)
+    ])
+    session.execute(insert(PriceOrm), [
+        {"id": i, "key": f"model-{i}", "price": i, "created_at": now, "updated_at": now}
+        for i in range(1, ROWS + 1)
+    ])
+    session.commit()
+
+
+def orm_path(session: Session, orm, mapper_class, _) -> list:
+    # expunge_all keeps the identity map from handing back already-hydrated objects
+    session.expunge_all()
+    return [mapper_class().model_to_entity(instance) for instance in session.scalars(select(orm)).all()]
+
+
+def core_path(session: Session, _, __, row_mapper) -> list:
+    return [row_mapper(row) for row in session.execute(select(*row_mapper.columns)).all()]
+
+
+def per_row_us(func, session: Session, case, repeat: int = 5) -> float:
+    timer = timeit.Timer(lambda: func(session, *case))
+    return min(timer.repeat(repeat=repeat, number=1)) / ROWS * 1e6
+
+
+def main() -> int:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[UserOrm.__table__, LedgerOrm.__table__, PriceOrm.__table__])
+    failed = False
+    with Session(engine) as session:
+        seed(session)
+        for case in CASES:
+            name = case[0].__tablename__
+            if orm_path(session, *case) != core_path(session, *case):
+                print(f"MISMATCH {name}: entities differ between the two paths")
+                failed = True
+                continue
+            before = per_row_us(orm_path, session, case)
+            after = per_row_us(core_path, session, case)
+            print(f"{name:<8} orm {before:>6.2f} us/row   core {after:>6.2f} us/row   x{before / after:.1f}")
+            if after > before:
+                print(f"REGRESSION: row mapper is slower for {name}")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
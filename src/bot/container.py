@@ -1,14 +1,29 @@
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from dependency_injector import containers, providers
 from openai import AsyncOpenAI
 
 from bot.database.connection import AlchemyDatabase
+from bot.database.listener import NotificationListener
+from bot.database.storage import FSM_CHANGED_CHANNEL, AlchemyStorage
 from bot.database.uow import Uow
+from bot.database.user_cache import USER_CHANGED_CHANNEL, UserCache
+from bot.metrics import MetricsServer
+from bot.middlewares.metrics import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from bot.middlewares.scheduler import UpdateSchedulerMiddleware
+from bot.middlewares.tracing import TracingMiddleware, TracingRequestMiddleware
+from bot.middlewares.uow import UnitOfWorkMiddleware, request_uow as scoped_uow
 from bot.services.gpt import OpenAIService
 from bot.services.user import UserService
-from bot.services.pricing import PricingService
+from bot.services.files import TelegramFileService
+from bot.services.daily_bonus import DailyBonusJob
+from bot.services.ledger_writer import LedgerWriter
+from bot.services.history import HistorySummarizer, ImageRetentionPolicy
+from bot.services.pricing import PriceSnapshot, PricingService
+from bot.services.rate_limiter import OpenAIRateLimiter
+from bot.services.response_cache import ResponseCache
+from bot.services.transcripts import TranscriptCache
 from bot.settings import settings
+from bot.utils.tracing import OtlpFileExporter
 
 
 from contextlib import asynccontextmanager
@@ -17,14 +32,126 @@ from typing import AsyncIterator
 
 class Container(containers.DeclarativeContainer):
     db = providers.Singleton(AlchemyDatabase, settings=settings.POSTGRES)
-    uow = providers.Factory(Uow, session_factory=db.provided.session_factory)
+    user_cache = providers.Singleton(
+        UserCache,
+        mode=settings.USER_CACHE.MODE,
+        max_entries=settings.USER_CACHE.MAX_ENTRIES,
+        ttl=settings.USER_CACHE.TTL,
+    )
+    user_change_listener = providers.Singleton(
+        NotificationListener,
+        dsn=str(settings.POSTGRES.URI).replace("+asyncpg", "", 1),
+        channel=USER_CHANGED_CHANNEL,
+        on_notify=user_cache.provided.on_notify,
+        on_connect=user_cache.provided.on_connect,
+        on_disconnect=user_cache.provided.on_disconnect,
+    )
+    uow = providers.Factory(Uow, session_factory=db.provided.session_factory, user_cache=user_cache)
+    # Joins the unit of work of the update being handled; background workers use ``uow``
+    request_uow = providers.Callable(scoped_uow, factory=uow.provider)
     bot = providers.Singleton(Bot, token=settings.MAIN_TOKEN)
-    storage = providers.Singleton(MemoryStorage)
+    storage = providers.Singleton(
+        AlchemyStorage,
+        db=db,
+        cache_size=settings.FSM.CACHE_SIZE,
+        flush_interval=settings.FSM.FLUSH_INTERVAL,
+        flush_batch_size=settings.FSM.FLUSH_BATCH_SIZE,
+        ttl=settings.FSM.CACHE_TTL,
+        notify=settings.FSM.NOTIFY,
+    )
+    fsm_change_listener = providers.Singleton(
+        NotificationListener,
+        dsn=str(settings.POSTGRES.URI).replace("+asyncpg", "", 1),
+        channel=FSM_CHANGED_CHANNEL,
+        on_notify=storage.provided.on_notify,
+        on_connect=storage.provided.on_connect,
+        on_disconnect=storage.provided.on_disconnect,
+    )
     dispatcher = providers.Singleton(Dispatcher, storage=storage)
-    pricing_service = providers.Factory(PricingService, uow=uow)
-    user_service = providers.Factory(UserService, uow=uow)
-    openai_client = providers.Singleton(AsyncOpenAI, api_key=settings.OPENAI.API_KEY)
-    openai_service = providers.Factory(OpenAIService, uow=uow, client=openai_client, pricing_service=pricing_service)
+    update_scheduler = providers.Singleton(
+        UpdateSchedulerMiddleware,
+        max_concurrency=settings.SCHEDULER.MAX_CONCURRENT_UPDATES,
+    )
+    uow_middleware = providers.Singleton(UnitOfWorkMiddleware, uow_factory=uow.provider)
+    update_metrics = providers.Singleton(UpdateMetricsMiddleware)
+    handler_metrics = providers.Singleton(HandlerMetricsMiddleware)
+    metrics_server = providers.Singleton(MetricsServer, host=settings.METRICS.HOST, port=settings.METRICS.PORT)
+    trace_exporter = providers.Singleton(OtlpFileExporter, path=settings.TRACING.EXPORT_PATH)
+    tracing = providers.Singleton(
+        TracingMiddleware,
+        slow_threshold=settings.TRACING.SLOW_UPDATE_THRESHOLD,
+        exporter=trace_exporter if settings.TRACING.EXPORT_PATH else None,
+    )
+    tracing_requests = providers.Singleton(TracingRequestMiddleware)
+    price_snapshot = providers.Singleton(
+        PriceSnapshot,
+        uow_factory=uow.provider,
+        refresh_interval=settings.PRICING.REFRESH_INTERVAL,
+    )
+    pricing_service = providers.Factory(PricingService, snapshot=price_snapshot)
+    ledger_writer = providers.Singleton(
+        LedgerWriter,
+        uow_factory=uow.provider,
+        flush_interval=settings.LEDGER.FLUSH_INTERVAL,
+        flush_batch_size=settings.LEDGER.FLUSH_BATCH_SIZE,
+    )
+    daily_bonus_job = providers.Factory(
+        DailyBonusJob,
+        uow_factory=uow.provider,
+        amount=settings.BONUS.DAILY_AMOUNT,
+        chunk_size=settings.BONUS.CHUNK_SIZE,
+    )
+    user_service = providers.Factory(UserService, uow=request_uow, ledger_writer=ledger_writer)
+    openai_client = providers.Singleton(AsyncOpenAI, api_key=settings.OPENAI.API_KEY, max_retries=0)
+    file_service = providers.Singleton(
+        TelegramFileService,
+        cache_dir=settings.FILES.CACHE_DIR,
+        max_cache_bytes=settings.FILES.MAX_CACHE_BYTES,
+        max_connections=settings.FILES.MAX_CONNECTIONS,
+    )
+    transcript_cache = providers.Singleton(
+        TranscriptCache,
+        uow_factory=uow.provider,
+        max_entries=settings.TRANSCRIPTS.CACHE_SIZE,
+        ttl=settings.TRANSCRIPTS.TTL,
+        persistent=settings.TRANSCRIPTS.PERSISTENT,
+    )
+    response_cache = providers.Singleton(
+        ResponseCache,
+        enabled=settings.RESPONSE_CACHE.ENABLED,
+        max_entries=settings.RESPONSE_CACHE.MAX_ENTRIES,
+        ttl=settings.RESPONSE_CACHE.TTL,
+    )
+    openai_rate_limiter = providers.Singleton(
+        OpenAIRateLimiter,
+        limits=settings.OPENAI.RATE_LIMITS,
+        max_retries=settings.OPENAI.MAX_RETRIES,
+    )
+    history_summarizer = providers.Singleton(
+        HistorySummarizer,
+        client=openai_client,
+        rate_limiter=openai_rate_limiter,
+        model=settings.HISTORY.SUMMARY_MODEL,
+    )
+    image_retention = providers.Singleton(
+        ImageRetentionPolicy,
+        max_turns=settings.HISTORY.IMAGE_RETENTION_TURNS,
+        default_max_turns=settings.HISTORY.DEFAULT_IMAGE_RETENTION_TURNS,
+    )
+    openai_service = providers.Factory(
+        OpenAIService,
+        uow=request_uow,
+        client=openai_client,
+        pricing_service=pricing_service,
+        rate_limiter=openai_rate_limiter,
+        summarizer=history_summarizer,
+        image_retention=image_retention,
+        history_settings=settings.HISTORY,
+        file_service=file_service,
+        transcripts=transcript_cache,
+        response_cache=response_cache,
+        ledger_writer=ledger_writer,
+    )
 
 
 @asynccontextmanager
@@ -5,6 +5,8 @@ import orjson
 from pydantic_core import to_jsonable_python as pydantic_encoder
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
+from bot.database.pool import InstrumentedAsyncPool, PoolStats
+from bot.metrics import instrument_engine
 from bot.settings import PostgresSettings
 from bot.settings import settings as config
 
@@ -19,13 +21,31 @@ class AlchemyDatabase:
             url=str(settings.URI),
             json_serializer=orjson_dumps,
             json_deserializer=orjson.loads,
+            poolclass=InstrumentedAsyncPool,
+            pool_size=settings.POOL_SIZE,
+            max_overflow=settings.MAX_OVERFLOW,
+            pool_timeout=settings.POOL_TIMEOUT,
+            pool_recycle=settings.POOL_RECYCLE,
+            pool_pre_ping=settings.POOL_PRE_PING,
+            query_cache_size=settings.QUERY_CACHE_SIZE,
+            connect_args={
+                "timeout": settings.CONNECT_TIMEOUT,
+                "command_timeout": settings.COMMAND_TIMEOUT,
+                # asyncpg's own cache and the one SQLAlchemy's adapter keeps on top of it
+                "statement_cache_size": settings.STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": settings.STATEMENT_CACHE_SIZE,
+            },
         )
+        instrument_engine(self._engine)
         self._session_factory = async_sessionmaker(bind=self._engine, expire_on_commit=False)
 
     @property
     def engine(self) -> AsyncEngine:
         return self._engine
 
+    def pool_stats(self) -> PoolStats:
+        return self._engine.sync_engine.pool.stats()
+
     @property
     def session_factory(self) -> async_sessionmaker[AsyncSession]:
         return self._session_factory
@@ -46,5 +66,5 @@ class AlchemyDatabase:
 
 db = AlchemyDatabase(config.POSTGRES)
 long_operation_db = AlchemyDatabase(
-    config.POSTGRES.model_copy(update={"CONNECTION_TIMEOUT": 600, "COMMAND_TIMEOUT": 600}),
+    config.POSTGRES.model_copy(update={"CONNECT_TIMEOUT": 600, "COMMAND_TIMEOUT": 600, "POOL_SIZE": 2, "MAX_OVERFLOW": 0}),
 )
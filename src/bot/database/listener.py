@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    """Keeps a dedicated asyncpg connection subscribed to a ``NOTIFY`` channel.
+
+    ``on_connect`` runs every time the subscription is (re)established, so consumers
+    can drop state that may have missed notifications while it was down. The
+    connection lives outside the SQLAlchemy pool and reconnects after
+    ``retry_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        on_notify: Callable[[str], None],
+        on_connect: Callable[[], None],
+        on_disconnect: Callable[[], None],
+        retry_interval: float = 5.0,
+    ):
+        self._dsn = dsn
+        self._channel = channel
+        self._on_notify = on_notify
+        self._on_connect = on_connect
+        self._on_disconnect = on_disconnect
+        self._retry_interval = retry_interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self._channel, lambda *args: self._on_notify(args[-1]))
+                self._on_connect()
+                logger.info(f"Listening to {self._channel} notifications")
+                await lost.wait()
+                logger.warning(f"Lost the {self._channel} notification connection")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Failed to listen to {self._channel} notifications")
+            finally:
+                self._on_disconnect()
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+            await asyncio.sleep(self._retry_interval)
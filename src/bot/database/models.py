@@ -1,7 +1,8 @@
-from datetime import datetime, UTC
+from datetime import date, datetime, UTC
 from typing import Annotated
 
-from sqlalchemy import MetaData, func
+from sqlalchemy import BigInteger, Index, MetaData, Sequence, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, declarative_mixin, DeclarativeBase
 
 metadata = MetaData()
@@ -45,10 +46,57 @@ class PriceOrm(Base, TimeMixin):
 
 
 class LedgerOrm(Base, TimeMixin):
+    """Monthly range partitions ``ledger_YYYY_MM`` plus ``ledger_default``, see bot.database.partitions."""
     __tablename__ = 'ledger'
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(Sequence("ledger_id_seq"), primary_key=True)
+    # The partition key has to be part of the primary key
+    created_at: Mapped[datetime] = mapped_column(
+        primary_key=True,
+        default=lambda: datetime.now(UTC).replace(tzinfo=None),
+        server_default=func.now(),
+    )
     user_id: Mapped[int] = mapped_column(nullable=False)
     delta: Mapped[int] = mapped_column(nullable=False)
     reason: Mapped[str] = mapped_column(nullable=False)
     meta: Mapped[str | None] = mapped_column(nullable=True)
+
+
+# Serves the account history: one user's entries, newest first, paged by id
+Index("ix_ledger_user_id_id", LedgerOrm.user_id, LedgerOrm.id.desc())
+
+
+class LedgerRollupOrm(Base, TimeMixin):
+    """Per-user, per-reason sums of ledger months whose detail partitions were compacted."""
+    __tablename__ = 'ledger_monthly_rollup'
+
+    user_id: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[date] = mapped_column(primary_key=True)
+    reason: Mapped[str] = mapped_column(primary_key=True)
+    delta: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    entries: Mapped[int] = mapped_column(nullable=False)
+
+
+class FsmStateOrm(Base, TimeMixin):
+    __tablename__ = 'fsm_states'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    state: Mapped[str | None] = mapped_column(nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+
+
+class TranscriptOrm(Base, TimeMixin):
+    __tablename__ = 'voice_transcripts'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    text: Mapped[str] = mapped_column(nullable=False)
+
+
+class BonusRunOrm(Base, TimeMixin):
+    __tablename__ = 'bonus_runs'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    cursor: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    granted: Mapped[int] = mapped_column(nullable=False, server_default="0")
+    completed_at: Mapped[datetime | None] = mapped_column(nullable=True)
@@ -0,0 +1,148 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, UTC
+
+from sqlalchemy import text
+
+from bot.database.connection import AlchemyDatabase
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_RE = re.compile(r"^ledger_(\d{4})_(\d{2})$")
+DEFAULT_PARTITION = "ledger_default"
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    return month_start(datetime.now(UTC).date())
+
+
+def as_timestamp(month: date) -> datetime:
+    return datetime.combine(month, time())
+
+
+def partition_name(month: date) -> str:
+    return f"ledger_{month:%Y_%m}"
+
+
+@dataclass
+class CompactedMonth:
+    month: date
+    entries: int
+    rollup_rows: int
+
+
+class LedgerPartitionManager:
+    """Maintenance of the monthly ``ledger`` partitions.
+
+    ``ensure_partitions`` creates upcoming months ahead of time, moving any rows that
+    already landed in ``ledger_default`` into the new partition. ``compact`` folds
+    months older than the cutoff into ``ledger_monthly_rollup`` and drops their
+    detail partitions; each month is handled in its own transaction.
+    """
+
+    def __init__(self, db: AlchemyDatabase):
+        self._db = db
+
+    async def partitions(self) -> list[date]:
+        async with self._db.session_scope() as session:
+            names = (await session.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'ledger'::regclass"
+            ))).scalars().all()
+        months = [date(int(m[1]), int(m[2]), 1) for name in names if (m := PARTITION_NAME_RE.match(name))]
+        return sorted(months)
+
+    async def ensure_partitions(self, months_ahead: int) -> list[date]:
+        existing = set(await self.partitions())
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current_month(), offset)
+            if month not in existing:
+                await self._create_partition(month)
+                created.append(month)
+        return created
+
+    async def compact(self, older_than_months: int) -> list[CompactedMonth]:
+        cutoff = add_months(current_month(), -older_than_months)
+        compacted = []
+        for month in await self.partitions():
+            if month >= cutoff:
+                break
+            compacted.append(await self._compact_partition(month))
+        compacted.extend(await self._compact_default(cutoff))
+        return compacted
+
+    async def _create_partition(self, month: date) -> None:
+        name = partition_name(month)
+        bounds = {"start": as_timestamp(month), "end": as_timestamp(add_months(month, 1))}
+        async with self._db.session_scope() as session:
+            await session.execute(text(f"CREATE TABLE {name} (LIKE ledger INCLUDING DEFAULTS)"))
+            moved = await session.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ),
+                bounds,
+            )
+            await session.execute(text(
+                f"ALTER TABLE ledger ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            ))
+        logger.info(f"Created ledger partition {name}, moved {moved.rowcount} rows from {DEFAULT_PARTITION}")
+
+    async def _compact_partition(self, month: date) -> CompactedMonth:
+        name = partition_name(month)
+        async with self._db.session_scope() as session:
+            entries, rollup_rows = (await session.execute(
+                text(
+                    "WITH totals AS ("
+                    f"SELECT user_id, reason, sum(delta) AS delta, count(*) AS entries FROM {name} "
+                    "GROUP BY user_id, reason"
+                    f"), rolled AS ({self._rollup_insert('CAST(:month AS date)')}) "
+                    "SELECT CAST(coalesce(sum(entries), 0) AS bigint), count(*) FROM totals"
+                ),
+                {"month": month},
+            )).one()
+            await session.execute(text(f"ALTER TABLE ledger DETACH PARTITION {name}"))
+            await session.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Compacted ledger partition {name}: {entries} entries into {rollup_rows} rollup rows")
+        return CompactedMonth(month=month, entries=entries, rollup_rows=rollup_rows)
+
+    async def _compact_default(self, cutoff: date) -> list[CompactedMonth]:
+        # Rows only land here when ensure_partitions did not run in time
+        async with self._db.session_scope() as session:
+            rows = (await session.execute(
+                text(
+                    "WITH expired AS ("
+                    f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < :cutoff RETURNING user_id, reason, delta, created_at"
+                    "), totals AS ("
+                    "SELECT user_id, CAST(date_trunc('month', created_at) AS date) AS month, reason, "
+                    "sum(delta) AS delta, count(*) AS entries FROM expired GROUP BY 1, 2, 3"
+                    f"), rolled AS ({self._rollup_insert('month')}) "
+                    "SELECT month, CAST(sum(entries) AS bigint), count(*) FROM totals GROUP BY month ORDER BY month"
+                ),
+                {"cutoff": as_timestamp(cutoff)},
+            )).all()
+        return [CompactedMonth(month=month, entries=entries, rollup_rows=rollup_rows) for month, entries, rollup_rows in rows]
+
+    @staticmethod
+    def _rollup_insert(month: str) -> str:
+        return (
+            "INSERT INTO ledger_monthly_rollup (user_id, month, reason, delta, entries) "
+            f"SELECT user_id, {month}, reason, delta, entries FROM totals "
+            "ON CONFLICT (user_id, month, reason) DO UPDATE SET "
+            "delta = ledger_monthly_rollup.delta + excluded.delta, "
+            "entries = ledger_monthly_rollup.entries + excluded.entries, "
+            "updated_at = now()"
+        )
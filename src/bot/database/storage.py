@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from copy import copy
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from bot.database.connection import AlchemyDatabase
+from bot.database.models import FsmStateOrm
+
+logger = logging.getLogger(__name__)
+
+FSM_CHANGED_CHANNEL = "fsm_state_changed"
+
+# Read by the fsm_states trigger, so a replica can skip notifications about its own writes
+SET_ORIGIN = select(func.set_config("vento.fsm_origin", bindparam("origin"), True))
+
+
+@dataclass
+class FsmRecord:
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+class AlchemyStorage(BaseStorage):
+    """FSM storage persisted in the ``fsm_states`` table.
+
+    Reads go through a per-process LRU cache. Writes only touch the cache and mark the
+    key dirty; a background task upserts all dirty keys in one statement every
+    ``flush_interval`` seconds or as soon as ``flush_batch_size`` keys are pending, so
+    several ``update_data`` calls within one update cost a single row write.
+
+    Cached records are reloaded after ``ttl`` seconds. With ``notify`` a trigger on
+    ``fsm_states`` publishes every written key on the ``fsm_state_changed`` channel and
+    other replicas drop their copy; while that subscription is down the cache is
+    bypassed. Writes still reach the table up to ``flush_interval`` late, so with several
+    replicas a chat that switches replica within that window can read its previous
+    state, so route a chat's updates to one replica or keep the interval short.
+    """
+
+    stats_counters = ("invalidations",)
+
+    def __init__(
+        self,
+        db: AlchemyDatabase,
+        cache_size: int,
+        flush_interval: float,
+        flush_batch_size: int,
+        ttl: float,
+        notify: bool,
+        key_builder: KeyBuilder | None = None,
+    ):
+        self._db = db
+        self._cache_size = cache_size
+        self._flush_interval = flush_interval
+        self._flush_batch_size = flush_batch_size
+        self._ttl = ttl
+        self._notify = notify
+        self._origin = uuid.uuid4().hex
+        self._live = not notify
+        self._key_builder = key_builder or DefaultKeyBuilder()
+        self._cache: OrderedDict[str, tuple[FsmRecord, float]] = OrderedDict()
+        self._dirty: dict[str, FsmRecord] = {}
+        # Records of the batch being upserted, still the newest copy until it commits
+        self._inflight: dict[str, FsmRecord] = {}
+        self._flushes = 0
+        self._flush_requested = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self.invalidations = 0
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key, record)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._get_record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        record = await self._get_record(key)
+        record.data = data.copy()
+        self._mark_dirty(key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return (await self._get_record(key)).data.copy()
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str, default: Any | None = None) -> Any | None:
+        record = await self._get_record(storage_key)
+        return copy(record.data.get(dict_key, default))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "cached": len(self._cache),
+            "dirty": len(self._dirty),
+            "live": self._live,
+            "invalidations": self.invalidations,
+        }
+
+    def on_notify(self, payload: str) -> None:
+        origin, _, db_key = payload.partition(":")
+        if origin == self._origin:
+            return
+        # A pending local write is newer than what we were notified about and overwrites it
+        if self._unflushed(db_key) is None and self._cache.pop(db_key, None) is not None:
+            self.invalidations += 1
+
+    def on_connect(self) -> None:
+        self._cache.clear()
+        self._live = True
+
+    def on_disconnect(self) -> None:
+        self._live = False
+        self._cache.clear()
+
+    async def close(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            # A flush cut short puts its batch back into ``_dirty``, wait for that first
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+        pending, self._dirty = self._dirty, {}
+        self._inflight.update(pending)
+        stmt = insert(FsmStateOrm).values(
+            [{"key": k, "state": r.state, "data": r.data} for k, r in pending.items()]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FsmStateOrm.key],
+            set_={"state": stmt.excluded.state, "data": stmt.excluded.data, "updated_at": func.now()},
+        )
+        try:
+            async with self._db.session_scope() as session:
+                if self._notify:
+                    await session.execute(SET_ORIGIN, {"origin": self._origin})
+                await session.execute(stmt)
+            self._flushes += 1
+        except BaseException:
+            # Keep newer writes that arrived during the flush, retry the rest next time
+            self._dirty = {**pending, **self._dirty}
+            raise
+        finally:
+            for db_key, record in pending.items():
+                if self._inflight.get(db_key) is record:
+                    del self._inflight[db_key]
+
+    async def _get_record(self, key: StorageKey) -> FsmRecord:
+        db_key = self._key_builder.build(key)
+        record = self._unflushed(db_key) or self._cached(db_key)
+        while record is None:
+            flushes = self._flushes
+            loaded = await self._load(db_key)
+            # Another coroutine may have populated the key while we were waiting; a flush that
+            # committed meanwhile may have written it after our snapshot, so load it again
+            record = self._unflushed(db_key) or self._cached(db_key)
+            if record is None and flushes == self._flushes:
+                record = loaded
+                self._remember(db_key, record)
+        return record
+
+    def _unflushed(self, db_key: str) -> FsmRecord | None:
+        return self._dirty.get(db_key) or self._inflight.get(db_key)
+
+    def _cached(self, db_key: str) -> FsmRecord | None:
+        entry = self._cache.get(db_key)
+        if entry is None:
+            return None
+        record, stored_at = entry
+        if not self._live or time.monotonic() - stored_at > self._ttl:
+            del self._cache[db_key]
+            return None
+        self._cache.move_to_end(db_key)
+        return record
+
+    def _remember(self, db_key: str, record: FsmRecord) -> None:
+        if not self._live:
+            return
+        self._cache[db_key] = (record, time.monotonic())
+        self._cache.move_to_end(db_key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def _load(self, db_key: str) -> FsmRecord:
+        async with self._db.session_scope() as session:
+            row = (await session.execute(
+                select(FsmStateOrm.state, FsmStateOrm.data).where(FsmStateOrm.key == db_key)
+            )).one_or_none()
+        return FsmRecord(state=row.state, data=row.data) if row else FsmRecord()
+
+    def _mark_dirty(self, key: StorageKey, record: FsmRecord) -> None:
+        db_key = self._key_builder.build(key)
+        self._dirty[db_key] = record
+        self._remember(db_key, record)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if len(self._dirty) >= self._flush_batch_size:
+            self._flush_requested.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush FSM storage")
@@ -1,29 +1,57 @@
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from bot.database.user_cache import UserCache
+from bot.utils.tracing import span
+
 from bot.interfaces.uow import AbcUnitOfWork
 from bot.repos.user import UserRepo
 from bot.repos.model_price import PriceRepo
 from bot.repos.ledger import LedgerRepo
+from bot.repos.transcript import TranscriptRepo
+from bot.repos.bonus_run import BonusRunRepo
 
 
 class Uow(AbcUnitOfWork):
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], user_cache: UserCache | None = None):
         self.session_factory = session_factory
+        self.user_cache = user_cache
 
     async def __aenter__(self) -> "AbcUnitOfWork":  # type: ignore[override]
-        self.session = self.session_factory()
+        # The session checks out a connection only when the first statement runs
+        if not self.active:
+            self.session = self.session_factory()
 
-        self.user = UserRepo(self.session)
-        self.price = PriceRepo(self.session)
-        self.ledger = LedgerRepo(self.session)
+            self.user = UserRepo(self.session, self.user_cache)
+            self.price = PriceRepo(self.session)
+            self.ledger = LedgerRepo(self.session)
+            self.transcript = TranscriptRepo(self.session)
+            self.bonus_run = BonusRunRepo(self.session)
 
         return await super().__aenter__()
 
     async def commit(self) -> None:
-        await self.session.commit()
+        with span("db.commit"):
+            await self.session.commit()
+        if self.user_cache is not None:
+            for user in self.user.pending.values():
+                self.user_cache.put(user)
+            self._release_users()
 
     async def rollback(self) -> None:
-        await self.session.rollback()
+        with span("db.rollback"):
+            await self.session.rollback()
+        if self.user_cache is not None:
+            for telegram_id in self.user.pending:
+                self.user_cache.invalidate(telegram_id)
+            self._release_users()
 
     async def shutdown(self) -> None:
+        # Still pending only if the commit failed
+        if self.user_cache is not None:
+            self._release_users()
         await self.session.close()
+
+    def _release_users(self) -> None:
+        for telegram_id in self.user.pending:
+            self.user_cache.release(telegram_id)
+        self.user.pending.clear()
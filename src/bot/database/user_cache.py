@@ -0,0 +1,143 @@
+import logging
+import time
+from collections import OrderedDict
+
+import orjson
+
+from bot.entities.user import UserEntity
+from bot.enums import UserCacheModeEnum
+
+logger = logging.getLogger(__name__)
+
+USER_CHANGED_CHANNEL = "user_changed"
+# Sent instead of rows by bulk updates, every cached user may be stale
+USERS_RESET = "*"
+
+
+def _newest(user: UserEntity, *others: UserEntity | None) -> UserEntity:
+    for other in others:
+        if other is not None and other.updated_at > user.updated_at:
+            user = other
+    return user
+
+
+class UserCache:
+    """Process-wide LRU of ``UserEntity`` by ``telegram_id`` with a TTL.
+
+    Units of work write the rows they read or wrote through to the cache once they
+    commit. In ``local`` mode that is the only source of freshness, so changes made by
+    other processes show up after ``ttl`` seconds. In ``notify`` mode a trigger on
+    ``users`` publishes every committed row on the ``user_changed`` channel and cached
+    entries are replaced from it; while that subscription is down the cache is
+    bypassed and it is cleared on reconnect, so no replica serves a row it could have
+    missed.
+
+    A row read by a unit of work may be overtaken before that unit commits, so rows
+    are ``watch``-ed from the moment they are read: notifications for watched keys are
+    kept even when the key is not cached, and whichever version has the latest
+    ``updated_at`` wins. Rows watched before a reconnect are not written through.
+    """
+
+    stats_counters = ("hits", "misses", "notifications")
+
+    def __init__(self, mode: UserCacheModeEnum, max_entries: int, ttl: float):
+        self.mode = mode
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[int, tuple[UserEntity, float]] = OrderedDict()
+        # Keys held by open units of work, and the newest notified rows for them
+        self._watched: dict[int, int] = {}
+        self._notified: dict[int, UserEntity] = {}
+        self._live = mode == UserCacheModeEnum.local
+        self.hits = 0
+        self.misses = 0
+        self.notifications = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != UserCacheModeEnum.off and self._live
+
+    def get(self, telegram_id: int) -> UserEntity | None:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(telegram_id)
+        if entry is not None and time.monotonic() - entry[1] > self._ttl:
+            del self._entries[telegram_id]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return entry[0]
+
+    def watch(self, telegram_id: int) -> None:
+        if self.enabled:
+            self._watched[telegram_id] = self._watched.get(telegram_id, 0) + 1
+
+    def release(self, telegram_id: int) -> None:
+        count = self._watched.pop(telegram_id, 0) - 1
+        if count > 0:
+            self._watched[telegram_id] = count
+        else:
+            self._notified.pop(telegram_id, None)
+
+    def put(self, user: UserEntity) -> None:
+        if not self.enabled or user.telegram_id not in self._watched:
+            return
+        entry = self._entries.get(user.telegram_id)
+        user = _newest(user, self._notified.get(user.telegram_id), entry[0] if entry else None)
+        self._entries[user.telegram_id] = (user, time.monotonic())
+        self._entries.move_to_end(user.telegram_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._entries.pop(telegram_id, None)
+
+    def on_notify(self, payload: str) -> None:
+        self.notifications += 1
+        if payload == USERS_RESET:
+            self._clear()
+            return
+        try:
+            row = orjson.loads(payload)
+            # Only users this process holds are refreshed, skip validating the rest
+            telegram_id = row.get("telegram_id")
+            if telegram_id not in self._entries and telegram_id not in self._watched:
+                return
+            user = UserEntity.model_validate(row)
+        except ValueError:
+            logger.warning(f"Malformed {USER_CHANGED_CHANNEL} payload: {payload[:200]}")
+            self._entries.clear()
+            return
+        if entry := self._entries.get(user.telegram_id):
+            self._entries[user.telegram_id] = (_newest(user, entry[0]), time.monotonic())
+        elif user.telegram_id in self._watched:
+            self._notified[user.telegram_id] = _newest(user, self._notified.get(user.telegram_id))
+
+    def on_connect(self) -> None:
+        self._clear()
+        self._live = True
+
+    def on_disconnect(self) -> None:
+        self._live = False
+        self._clear()
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._watched.clear()
+        self._notified.clear()
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "live": self._live,
+            "size": len(self._entries),
+            "watched": len(self._watched),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "notifications": self.notifications,
+        }
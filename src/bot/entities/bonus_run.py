@@ -0,0 +1,16 @@
+from datetime import datetime, UTC
+
+from pydantic import BaseModel, Field
+
+
+class BonusRunDTO(BaseModel):
+    key: str
+    cursor: int = 0
+    granted: int = 0
+    completed_at: datetime | None = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC).replace(tzinfo=None))
+    updated_at: datetime | None = None
+
+
+class BonusRunEntity(BonusRunDTO):
+    pass
@@ -1,6 +1,6 @@
 from datetime import datetime, UTC
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class LedgerDTO(BaseModel):
@@ -14,6 +14,6 @@ class LedgerDTO(BaseModel):
 
 
 class LedgerEntity(LedgerDTO):
-    pass
+    model_config = ConfigDict(frozen=True)
 
 
@@ -1,6 +1,6 @@
 from datetime import datetime, UTC
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class PriceDTO(BaseModel):
@@ -12,4 +12,4 @@ class PriceDTO(BaseModel):
 
 
 class PriceEntity(PriceDTO):
-    pass
+    model_config = ConfigDict(frozen=True)
@@ -0,0 +1,14 @@
+from datetime import datetime, UTC
+
+from pydantic import BaseModel, Field
+
+
+class TranscriptDTO(BaseModel):
+    key: str
+    text: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC).replace(tzinfo=None))
+    updated_at: datetime | None = None
+
+
+class TranscriptEntity(TranscriptDTO):
+    pass
@@ -1,6 +1,6 @@
 from datetime import datetime, UTC
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class UserDTO(BaseModel):
@@ -13,4 +13,5 @@ class UserDTO(BaseModel):
 
 
 class UserEntity(UserDTO):
-    pass
+    # The same instance is handed out by UserCache to every caller, nobody may change it in place
+    model_config = ConfigDict(frozen=True)
@@ -1,4 +1,4 @@
-from enum import StrEnum, auto
+from enum import IntEnum, StrEnum, auto
 
 
 class BotModeEnum(StrEnum):
@@ -7,3 +7,17 @@ class BotModeEnum(StrEnum):
     gpt5_mini = "GPT-5 Mini"
     dalle3 = "DALL-E 3"
     veo = "Veo-3"
+
+
+class OpenAIPriorityEnum(IntEnum):
+    high = 0
+    normal = 1
+    low = 2
+
+
+class UserCacheModeEnum(StrEnum):
+    off = "off"
+    # Write-through only, other processes' changes are seen after the TTL
+    local = "local"
+    # Refreshed from users row notifications, safe with several replicas
+    notify = "notify"
@@ -4,4 +4,19 @@ class OpenAIBadRequestError(Exception):
 
 class InsufficientBalanceError(Exception):
     """Raised when a user has not enough tokens to perform an action."""
-    pass
\ No newline at end of file
+    pass
+
+
+class EmptyPromptError(Exception):
+    """Raised when an image is requested by a message without text."""
+    pass
+
+
+class OpenAIRateLimitedError(Exception):
+    """Raised when OpenAI still answers 429 after every retry of a request."""
+    pass
+
+
+class BonusRunConflictError(Exception):
+    """Raised when another worker advanced the same bonus run first."""
+    pass
@@ -7,9 +7,11 @@ from dependency_injector.wiring import inject, Provide
 
 from bot.container import Container
 from bot.enums import BotModeEnum
-from bot.errors import OpenAIBadRequestError, InsufficientBalanceError
+from bot.errors import EmptyPromptError, OpenAIBadRequestError, InsufficientBalanceError, OpenAIRateLimitedError
 from bot.interfaces.services.gpt import AbcOpenAIService
 from bot.keyboards.change_ai import mode_keyboard
+from bot.settings import settings
+from bot.utils.stream_writer import MessageStreamWriter
 
 logger = logging.getLogger(__name__)
 
@@ -37,26 +39,36 @@ async def common_message_handler(
 
     if mode == BotModeEnum.gpt5:
         status_msg = await message.answer("🔄 *Генерация ответа...*", parse_mode="Markdown")
+        writer = MessageStreamWriter(status_msg, settings.STREAM)
         try:
-            response = await openai_service.process_gpt_request(message, state)
-            if response.image_url:
-                await message.answer_photo(response.image_url, caption="🖼️ Вот твоё изображение\n\n[Сделано в Vento](https://t.me/vento_toolbot)", parse_mode="Markdown")
-            else:
-                await status_msg.edit_text(response.text, parse_mode="Markdown")
+            async for chunk in openai_service.stream_gpt_request(message, state):
+                if chunk.image_url:
+                    sent = await message.answer_photo(chunk.image_url, caption="🖼️ Вот твоё изображение\n\n[Сделано в Vento](https://t.me/vento_toolbot)", parse_mode="Markdown")
+                    openai_service.remember_image(chunk, sent.photo[-1].file_id)
+                elif chunk.text:
+                    await writer.feed(chunk.text)
+            await writer.finish()
         except InsufficientBalanceError:
             await status_msg.edit_text("❗️ Недостаточно токенов для запроса. Пополни баланс или попробуй позже.", parse_mode="Markdown")
         except OpenAIBadRequestError:
             await status_msg.edit_text("❗️ *OpenAI отклонил твой запрос :(*\nПожалуйста, попробуй изменить его.", parse_mode="Markdown")
+        except OpenAIRateLimitedError:
+            await status_msg.edit_text("❗️ *OpenAI сейчас перегружен*\nТокены за запрос возвращены, попробуй чуть позже.", parse_mode="Markdown")
 
     elif mode == BotModeEnum.dalle3:
         status_msg = await message.answer("🔄 *Генерация изображения...*", parse_mode="Markdown")
         try:
             response = await openai_service.process_dalle_request(message)
-            await message.answer_photo(response.image_url, caption="🖼️ Вот твоё изображение\n\n[Сделано в Vento](https://t.me/vento_toolbot)", parse_mode="Markdown")
+            sent = await message.answer_photo(response.image_url, caption="🖼️ Вот твоё изображение\n\n[Сделано в Vento](https://t.me/vento_toolbot)", parse_mode="Markdown")
+            openai_service.remember_image(response, sent.photo[-1].file_id)
+        except EmptyPromptError:
+            await status_msg.edit_text("✏️ Опиши текстом, какое изображение сгенерировать.", parse_mode="Markdown")
         except InsufficientBalanceError:
             await status_msg.edit_text("❗️ Недостаточно токенов для генерации DALL·E 3.", parse_mode="Markdown")
         except OpenAIBadRequestError:
             await status_msg.edit_text("❗️ *К сожалению, OpenAI отклонил ваш запрос*\nПожалуйста, попробуйте изменить его.", parse_mode="Markdown")
+        except OpenAIRateLimitedError:
+            await status_msg.edit_text("❗️ *OpenAI сейчас перегружен*\nТокены за генерацию возвращены, попробуй чуть позже.", parse_mode="Markdown")
 
     elif mode == BotModeEnum.passive or not mode:
         await message.answer("👇 Сначала выбери, куда будем делать запрос:", reply_markup=mode_keyboard(BotModeEnum.passive))
@@ -10,6 +10,8 @@ from bot.interfaces.services.user import AbcUserService
 from bot.interfaces.services.pricing import AbcPricingService
 from bot.keyboards.change_ai import mode_keyboard
 from bot.keyboards.start import account_keyboard, start_keyboard
+from bot.services.history import HistorySummarizer
+from bot.settings import settings
 from bot.interfaces.uow import AbcUnitOfWork
 from bot.interfaces.services.pricing import AbcPricingService
 
@@ -67,25 +69,58 @@ async def set_mode_dalle(
         parse_mode="Markdown",
     )
 
+LEDGER_PAGE_SIZE = 10
+
+
 @router.callback_query(F.data == "goto:account")
+async def goto_account(call: CallbackQuery):
+    await call.answer()
+    await _show_account(call)
+
+
+@router.callback_query(F.data.startswith("account:"))
+async def page_account(call: CallbackQuery):
+    await call.answer()
+    _, direction, cursor = call.data.split(":")
+    if direction == "older":
+        await _show_account(call, before_id=int(cursor))
+    else:
+        await _show_account(call, after_id=int(cursor))
+
+
 @inject
-async def goto_account(
+async def _show_account(
     call: CallbackQuery,
+    before_id: int | None = None,
+    after_id: int | None = None,
     service: AbcUserService = Provide[Container.user_service],
-    uow: AbcUnitOfWork = Provide[Container.uow],
+    uow: AbcUnitOfWork = Provide[Container.request_uow],
 ):
-    await call.answer()
-
     first_name = call.from_user.first_name
     last_name = call.from_user.last_name if call.from_user.last_name else None
     username = call.from_user.username if call.from_user.username else None
     user = await service.get_user(call.from_user.id)
-    # Fetch last 10 ledger items
+    # One extra row tells whether there is another page in the direction we are moving
     async with uow:
-        ledger_items = await uow.ledger.list_for_user(user.id, limit=10)
+        ledger_items = await uow.ledger.list_for_user(
+            user.id, before_id=before_id, after_id=after_id, limit=LEDGER_PAGE_SIZE + 1
+        )
+    has_more = len(ledger_items) > LEDGER_PAGE_SIZE
+    if after_id is not None and not has_more:
+        # Reached the newest entries, show a full first page instead of a short tail
+        after_id = None
+        async with uow:
+            ledger_items = await uow.ledger.list_for_user(user.id, limit=LEDGER_PAGE_SIZE + 1)
+        has_more = len(ledger_items) > LEDGER_PAGE_SIZE
+    if after_id is not None:
+        ledger_items = ledger_items[-LEDGER_PAGE_SIZE:]
+        has_newer, has_older = has_more, True
+    else:
+        ledger_items = ledger_items[:LEDGER_PAGE_SIZE]
+        has_newer, has_older = before_id is not None, has_more
     # Format a simple table
     lines = [
-        "📒 Последние транзакции:",
+        "📒 Транзакции:" if has_newer else "📒 Последние транзакции:",
     ]
     for item in ledger_items:
         sign = "+" if item.delta > 0 else "−"
@@ -98,16 +133,18 @@ async def goto_account(
             f"🎟️ *Аккаунт*\n\n"
             f"🐻‍❄️ *{first_name}{f" {last_name}" if last_name else ""}{f" (@{username})" if username else ""}*\n\n"
             f"🪙 Баланс: *{user.balance}* токенов\n"
-            f"🎁 Ежедневно: *+200* токенов\n\n"
+            f"🎁 Ежедневно: *+{settings.BONUS.DAILY_AMOUNT}* токенов\n\n"
             f"{ledger_text}\n\n"
             f"👇 Действия:"
         ),
-        reply_markup=account_keyboard,
+        reply_markup=account_keyboard(
+            newer_cursor=ledger_items[0].id if has_newer and ledger_items else None,
+            older_cursor=ledger_items[-1].id if has_older and ledger_items else None,
+        ),
         parse_mode=ParseMode.MARKDOWN,
     )
 
 
-
 @router.callback_query(F.data == "goto:start")
 @inject
 async def goto_start(
@@ -115,10 +152,11 @@ async def goto_start(
     state: FSMContext,
     service: AbcUserService = Provide[Container.user_service],
     pricing: AbcPricingService = Provide[Container.pricing_service],
+    summarizer: HistorySummarizer = Provide[Container.history_summarizer],
 ):
     await call.answer()
 
-    await state.update_data(history=[])
+    await summarizer.reset(state)
     user, _ = await service.is_user_new(call.from_user)
     mode = (await state.get_data()).get('mode', BotModeEnum.passive)
     price = await pricing.get_price_for_mode(mode)
@@ -142,10 +180,12 @@ async def goto_switch(
     pricing: AbcPricingService = Provide[Container.pricing_service],
 ):
     user = await service.get_user(call.from_user.id)
-    can_gpt5 = await pricing.ensure_user_can_afford(user.balance, BotModeEnum.gpt5)
+    prices = await pricing.get_prices([BotModeEnum.gpt5, BotModeEnum.dalle3])
+    can_gpt5 = user.balance >= prices[BotModeEnum.gpt5]
+    can_dalle = user.balance >= prices[BotModeEnum.dalle3]
     text = "👇 Выбери нужный ИИ:\n\n"
     text += f"GPT-5 {'✅ доступен' if can_gpt5 else '⛔️ недоступен (мало токенов)'}\n"
-    text += f"DALL·E 3 {'✅ доступен' if await pricing.ensure_user_can_afford(user.balance, BotModeEnum.dalle3) else '⛔️ недоступен (мало токенов)'}"
+    text += f"DALL·E 3 {'✅ доступен' if can_dalle else '⛔️ недоступен (мало токенов)'}"
     await call.message.edit_text(
         text=text,
         reply_markup=mode_keyboard(BotModeEnum.passive),
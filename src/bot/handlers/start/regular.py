@@ -12,6 +12,7 @@ from bot.enums import BotModeEnum
 from bot.interfaces.services.user import AbcUserService
 from bot.interfaces.services.pricing import AbcPricingService
 from bot.keyboards.start import start_keyboard
+from bot.services.history import HistorySummarizer
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +25,12 @@ async def start_handler(
     state: FSMContext,
     user_service: AbcUserService = Provide[Container.user_service],
     pricing_service: AbcPricingService = Provide[Container.pricing_service],
+    summarizer: HistorySummarizer = Provide[Container.history_summarizer],
 ):
     state_data = await state.get_data()
     user, is_new = await user_service.is_user_new(message.from_user)
     if is_new:
-        await state.update_data(history=[], mode=BotModeEnum.passive)
+        await summarizer.reset(state, mode=BotModeEnum.passive)
         await message.answer(
             text=(
                 "🎉 Добро пожаловать, я *Vento*!\n\n"
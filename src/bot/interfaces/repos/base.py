@@ -1,5 +1,6 @@
 import abc
 from abc import ABC, abstractmethod
+from functools import cache
 from typing import Any, Generic, TypeVar
 
 Entity = TypeVar("Entity", bound=Any)
@@ -16,6 +17,11 @@ class DataMapper(Generic[Entity, MapperModel], ABC):
         pass
 
 
+@cache
+def _mapper_instance(mapper_class: type[DataMapper]) -> DataMapper:
+    return mapper_class()
+
+
 class AbcRepo(Generic[Entity], metaclass=abc.ABCMeta):
     """An interface for a generic repository"""
 
@@ -25,7 +31,8 @@ class AbcRepo(Generic[Entity], metaclass=abc.ABCMeta):
     def data_mapper(self) -> DataMapper:
         if not self._mapper_class:
             raise DataMapperNotSetError
-        return self._mapper_class()
+        # Mappers are stateless, one instance per class is shared by every repository
+        return _mapper_instance(self._mapper_class)
 
     def map_model_to_entity(self, instance: Any) -> Entity:
         return self.data_mapper.model_to_entity(instance)
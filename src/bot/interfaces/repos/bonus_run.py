@@ -0,0 +1,21 @@
+from abc import abstractmethod
+
+from bot.entities.bonus_run import BonusRunEntity
+from bot.interfaces.repos.base import AbcRepo
+
+
+class AbcBonusRunRepo(AbcRepo[BonusRunEntity]):
+    @abstractmethod
+    async def get_or_create(self, key: str) -> BonusRunEntity:
+        """Fetch the run stored under ``key``, starting a new one if there is none."""
+
+    @abstractmethod
+    async def advance(self, key: str, cursor: int, next_cursor: int, granted: int) -> bool:
+        """Move the run from ``cursor`` to ``next_cursor`` and add ``granted``.
+
+        Returns False if the run is no longer at ``cursor``, e.g. another worker took the chunk.
+        """
+
+    @abstractmethod
+    async def complete(self, key: str) -> None:
+        """Mark the run as finished."""
@@ -6,11 +6,18 @@ from bot.interfaces.repos.base import AbcRepo
 
 class AbcLedgerRepo(AbcRepo[LedgerEntity]):
     @abstractmethod
-    async def add(self, entry: LedgerEntity) -> LedgerEntity:
-        ...
+    async def add_many(self, entries: list[LedgerEntity]) -> None:
+        """Insert entries in one batched statement without reading them back."""
 
     @abstractmethod
-    async def list_for_user(self, user_id: int, limit: int = 20) -> list[LedgerEntity]:
-        ...
+    async def list_for_user(
+        self,
+        user_id: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 20,
+    ) -> list[LedgerEntity]:
+        """Return up to ``limit`` entries newest first, older than ``before_id`` or the
+        ones right after ``after_id``. Pages are keyset-based and never use OFFSET."""
 
 
@@ -8,3 +8,7 @@ class AbcPriceRepo(AbcRepo[PriceEntity]):
     @abstractmethod
     async def get_by_key(self, key: str) -> PriceEntity | None:
         """Fetch a model price by programmatic key (e.g., 'gpt5')."""
+
+    @abstractmethod
+    async def list_all(self) -> list[PriceEntity]:
+        """Fetch every model price in one query."""
@@ -0,0 +1,15 @@
+from abc import abstractmethod
+from datetime import datetime
+
+from bot.entities.transcript import TranscriptEntity
+from bot.interfaces.repos.base import AbcRepo
+
+
+class AbcTranscriptRepo(AbcRepo[TranscriptEntity]):
+    @abstractmethod
+    async def get_any(self, keys: list[str], newer_than: datetime) -> TranscriptEntity | None:
+        """Fetch the freshest transcript stored under any of the keys."""
+
+    @abstractmethod
+    async def upsert(self, keys: list[str], text: str) -> None:
+        """Store the transcript under every key, refreshing its timestamp."""
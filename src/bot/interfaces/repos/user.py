@@ -20,3 +20,21 @@ class AbcUserRepo(AbcRepo[UserEntity]):
     @abstractmethod
     async def update_balance_by_user_id(self, user_id: int, delta: int) -> UserEntity | None:
         """Atomically update balance for a user by id and return updated entity."""
+
+    @abstractmethod
+    async def max_id(self) -> int:
+        """Return the highest user id, or 0 if there are no users."""
+
+    @abstractmethod
+    async def grant_bonus(self, id_from: int, id_to: int, amount: int, reason: str, meta: str | None = None) -> int:
+        """Credit every user with ``id_from <= id < id_to`` and write their ledger entries.
+
+        One UPDATE and one multi-row INSERT in a single statement; returns the number of users.
+        """
+
+    @abstractmethod
+    async def debit(self, telegram_id: int, amount: int) -> UserEntity | None:
+        """Charge the user if the balance covers ``amount``.
+
+        Returns the updated entity, or None if the balance is insufficient.
+        """
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from aiogram import Bot
+from openai.types.chat import ChatCompletionMessageParam
+
+
+class AbcTelegramFileService(ABC):
+    @abstractmethod
+    async def fetch(self, bot: Bot, file_id: str, file_unique_id: str) -> Path:
+        """Return the local path of a Telegram file, downloading it on a cache miss."""
+
+    @abstractmethod
+    async def read(self, bot: Bot, file_id: str, file_unique_id: str) -> memoryview:
+        """Return the file contents as a read-only memory-mapped view."""
+
+    @abstractmethod
+    def image_ref(self, file_id: str, file_unique_id: str) -> str:
+        """Build a token-free reference to a Telegram image for storing in history."""
+
+    @abstractmethod
+    async def resolve_image_refs(self, bot: Bot, messages: list[ChatCompletionMessageParam]) -> list[ChatCompletionMessageParam]:
+        """Return messages with image references replaced by data URLs."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
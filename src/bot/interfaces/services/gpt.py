@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
@@ -12,6 +13,14 @@ class AbcOpenAIService(ABC):
     async def process_gpt_request(self, message: Message, state: FSMContext) -> GPTMessageResponse:
         ...
 
+    @abstractmethod
+    def stream_gpt_request(self, message: Message, state: FSMContext) -> AsyncIterator[GPTMessageResponse]:
+        """Yield text deltas as they arrive from the model, or a single image response."""
+
     @abstractmethod
     async def process_dalle_request(self, message: Message, history: list[ChatCompletionMessageParam] | None = None) -> GPTMessageResponse:
         ...
+
+    @abstractmethod
+    def remember_image(self, response: GPTMessageResponse, file_id: str) -> None:
+        """Cache the Telegram ``file_id`` of a sent DALL·E image for identical prompts."""
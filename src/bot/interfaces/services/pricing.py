@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterable
 
 from bot.enums import BotModeEnum
 
@@ -8,6 +9,14 @@ class AbcPricingService(ABC):
     async def get_price_for_mode(self, mode: BotModeEnum) -> int:
         """Return price in tokens for a given mode."""
 
+    @abstractmethod
+    async def get_prices(self, modes: Iterable[BotModeEnum]) -> dict[BotModeEnum, int]:
+        """Return prices in tokens for several modes in one lookup."""
+
+    @abstractmethod
+    def invalidate(self) -> None:
+        """Drop the cached price table so the next lookup reloads it."""
+
     @abstractmethod
     async def ensure_user_can_afford(self, user_balance: int, mode: BotModeEnum) -> bool:
         """Return True if the balance is enough for at least one request in given mode."""
@@ -5,14 +5,33 @@ from typing import Self
 from bot.interfaces.repos.user import AbcUserRepo
 from bot.interfaces.repos.model_price import AbcPriceRepo
 from bot.interfaces.repos.ledger import AbcLedgerRepo
+from bot.interfaces.repos.transcript import AbcTranscriptRepo
+from bot.interfaces.repos.bonus_run import AbcBonusRunRepo
 
 
 class AbcUnitOfWork(ABC):
+    """Transaction boundary shared by the repositories.
+
+    ``async with`` blocks nest: only the outermost one commits and shuts down, inner
+    blocks join its transaction. An exception leaving an inner block marks the whole
+    unit for rollback even if the caller handles it.
+    """
+
     user: AbcUserRepo
     price: AbcPriceRepo
     ledger: AbcLedgerRepo
+    transcript: AbcTranscriptRepo
+    bonus_run: AbcBonusRunRepo
+
+    _depth: int = 0
+    _rollback_only: bool = False
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
 
     async def __aenter__(self) -> Self:
+        self._depth += 1
         return self
 
     async def __aexit__(
@@ -21,12 +40,20 @@ class AbcUnitOfWork(ABC):
         exc_val: BaseException | None,
         exc_tb: TracebackType,
     ) -> None:
+        self._depth -= 1
         if exc_type is not None:
-            await self.rollback()
-        else:
-            await self.commit()
+            self._rollback_only = True
+        if self._depth:
+            return
 
-        await self.shutdown()
+        try:
+            if self._rollback_only:
+                await self.rollback()
+            else:
+                await self.commit()
+        finally:
+            self._rollback_only = False
+            await self.shutdown()
 
     @abstractmethod
     async def commit(self) -> None:
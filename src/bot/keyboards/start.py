@@ -9,7 +9,14 @@ def start_keyboard(current_mode: BotModeEnum) -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text=switch_label, callback_data="goto:switch")],
     ])
 
-account_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-    [InlineKeyboardButton(text="💰 Пополнить баланс", callback_data="goto:replenish")],
-    [InlineKeyboardButton(text="🔙 Назад", callback_data="goto:start")],
-])
+def account_keyboard(newer_cursor: int | None = None, older_cursor: int | None = None) -> InlineKeyboardMarkup:
+    pages = []
+    if newer_cursor is not None:
+        pages.append(InlineKeyboardButton(text="⬅️ Новее", callback_data=f"account:newer:{newer_cursor}"))
+    if older_cursor is not None:
+        pages.append(InlineKeyboardButton(text="Старее ➡️", callback_data=f"account:older:{older_cursor}"))
+    return InlineKeyboardMarkup(inline_keyboard=[
+        *([pages] if pages else []),
+        [InlineKeyboardButton(text="💰 Пополнить баланс", callback_data="goto:replenish")],
+        [InlineKeyboardButton(text="🔙 Назад", callback_data="goto:start")],
+    ])
@@ -2,25 +2,169 @@ import asyncio
 import logging
 
 from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
 from dependency_injector.wiring import Provide, inject
 
 from bot.container import Container
 from bot.container import lifecycle
+from bot.database.listener import NotificationListener
+from bot.database.connection import AlchemyDatabase
+from bot.database.pool import InstrumentedAsyncPool
+from bot.database.storage import AlchemyStorage
+from bot.database.user_cache import UserCache
+from bot.enums import UserCacheModeEnum
 from bot.handlers import router
+from bot.metrics import MetricsServer, register_stats
+from bot.middlewares.metrics import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from bot.middlewares.tracing import TracingMiddleware, TracingRequestMiddleware
+from bot.middlewares.scheduler import UpdateSchedulerMiddleware
+from bot.middlewares.uow import UnitOfWorkMiddleware
+from bot.interfaces.services.files import AbcTelegramFileService
+from bot.services.history import HistorySummarizer, ImageRetentionPolicy
+from bot.services.ledger_writer import LedgerWriter
+from bot.services.pricing import PriceSnapshot
+from bot.services.rate_limiter import OpenAIRateLimiter
+from bot.services.response_cache import ResponseCache
+from bot.services.transcripts import TranscriptCache
+from bot.settings import settings
+from bot.webhook import BoundedRequestHandler
 
 logging.basicConfig(level=logging.DEBUG)
 
+logger = logging.getLogger(__name__)
+
+
 @inject
-async def _run(
+def _setup_tracing(
+    dp: Dispatcher,
     bot: Bot = Provide[Container.bot],
-    dp: Dispatcher = Provide[Container.dispatcher],
+    tracing: TracingMiddleware = Provide[Container.tracing],
+    tracing_requests: TracingRequestMiddleware = Provide[Container.tracing_requests],
 ) -> None:
+    dp.update.outer_middleware(tracing)
+    bot.session.middleware(tracing_requests)
+    dp.shutdown.register(tracing.close)
+
+
+@inject
+def _setup_metrics(
+    dp: Dispatcher,
+    update_scheduler: UpdateSchedulerMiddleware,
+    ledger_writer: LedgerWriter,
+    db: AlchemyDatabase = Provide[Container.db],
+    storage: AlchemyStorage = Provide[Container.storage],
+    user_cache: UserCache = Provide[Container.user_cache],
+    response_cache: ResponseCache = Provide[Container.response_cache],
+    transcript_cache: TranscriptCache = Provide[Container.transcript_cache],
+    image_retention: ImageRetentionPolicy = Provide[Container.image_retention],
+    rate_limiter: OpenAIRateLimiter = Provide[Container.openai_rate_limiter],
+    update_metrics: UpdateMetricsMiddleware = Provide[Container.update_metrics],
+    handler_metrics: HandlerMetricsMiddleware = Provide[Container.handler_metrics],
+    metrics_server: MetricsServer = Provide[Container.metrics_server],
+) -> None:
+    # Outermost, so in-flight and latency include the wait in the update scheduler
+    dp.update.outer_middleware(update_metrics)
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
+    register_stats("vento_scheduler", update_scheduler.stats, counters=update_scheduler.stats_counters)
+    register_stats("vento_db_pool", db.pool_stats, counters=InstrumentedAsyncPool.stats_counters)
+    register_stats("vento_fsm_storage", storage.stats, counters=storage.stats_counters)
+    register_stats("vento_user_cache", user_cache.stats, counters=user_cache.stats_counters)
+    register_stats("vento_ledger_writer", ledger_writer.stats, counters=ledger_writer.stats_counters)
+    register_stats("vento_response_cache", response_cache.stats, counters=response_cache.stats_counters)
+    register_stats("vento_transcript_cache", transcript_cache.stats, counters=transcript_cache.stats_counters)
+    register_stats("vento_image_retention", image_retention.stats, counters=image_retention.stats_counters)
+    register_stats(
+        "vento_openai_rate_limiter", rate_limiter.stats, label="model", counters=rate_limiter.stats_counters
+    )
+    dp.startup.register(metrics_server.start)
+    dp.shutdown.register(metrics_server.stop)
+
+
+@inject
+def _setup_dispatcher(
+    dp: Dispatcher = Provide[Container.dispatcher],
+    price_snapshot: PriceSnapshot = Provide[Container.price_snapshot],
+    update_scheduler: UpdateSchedulerMiddleware = Provide[Container.update_scheduler],
+    uow_middleware: UnitOfWorkMiddleware = Provide[Container.uow_middleware],
+    history_summarizer: HistorySummarizer = Provide[Container.history_summarizer],
+    file_service: AbcTelegramFileService = Provide[Container.file_service],
+    ledger_writer: LedgerWriter = Provide[Container.ledger_writer],
+    user_change_listener: NotificationListener = Provide[Container.user_change_listener],
+    fsm_change_listener: NotificationListener = Provide[Container.fsm_change_listener],
+) -> Dispatcher:
+    if settings.TRACING.ENABLED:
+        _setup_tracing(dp)
+    if settings.METRICS.ENABLED:
+        _setup_metrics(dp, update_scheduler, ledger_writer)
+    dp.update.outer_middleware(update_scheduler)
+    dp.update.outer_middleware(uow_middleware)
     dp.include_router(router)
+    dp.startup.register(price_snapshot.start)
+    if settings.USER_CACHE.MODE == UserCacheModeEnum.notify:
+        dp.startup.register(user_change_listener.start)
+        dp.shutdown.register(user_change_listener.stop)
+    if settings.FSM.NOTIFY:
+        dp.startup.register(fsm_change_listener.start)
+        dp.shutdown.register(fsm_change_listener.stop)
+    dp.shutdown.register(price_snapshot.stop)
+    dp.shutdown.register(history_summarizer.close)
+    dp.shutdown.register(file_service.close)
+    dp.shutdown.register(ledger_writer.close)
+    return dp
+
+@inject
+async def _run(
+    bot: Bot = Provide[Container.bot],
+) -> None:
+    dp = _setup_dispatcher()
     await dp.start_polling(bot)
 
-async def main():
+@inject
+async def _run_webhook(
+    bot: Bot = Provide[Container.bot],
+) -> None:
+    config = settings.WEBHOOK
+    dp = _setup_dispatcher()
+
+    async def set_webhook() -> None:
+        if not config.BASE_URL:
+            logger.warning("WEBHOOK__BASE_URL is not set, expecting the webhook to be registered externally")
+            return
+        await bot.set_webhook(
+            url=f"{config.BASE_URL.rstrip('/')}{config.PATH}",
+            secret_token=config.SECRET_TOKEN,
+            max_connections=config.MAX_CONNECTIONS,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+
+    dp.startup.register(set_webhook)
+
+    app = web.Application()
+    BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        max_in_flight=config.MAX_IN_FLIGHT,
+        secret_token=config.SECRET_TOKEN,
+    ).register(app, path=config.PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=config.HOST, port=config.PORT).start()
+        logger.info(f"Serving webhook on {config.HOST}:{config.PORT}{config.PATH}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+async def main(webhook: bool = False):
     async with lifecycle():
-        await _run()
+        if webhook:
+            await _run_webhook()
+        else:
+            await _run()
 
-def start_bot():
-    asyncio.run(main())
+def start_bot(webhook: bool = False):
+    asyncio.run(main(webhook))
@@ -0,0 +1,141 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from bot.utils.prometheus import MetricsRegistry, StatsCollector, metrics
+from bot.utils.tracing import record, span
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+UPDATES_IN_FLIGHT = metrics.gauge("vento_updates_in_flight", "Updates being handled right now")
+UPDATE_LATENCY = metrics.histogram("vento_update_duration_seconds", "Time from receiving an update to finishing it")
+HANDLER_LATENCY = metrics.histogram(
+    "vento_handler_duration_seconds", "Time spent in an aiogram handler", ("handler",)
+)
+HANDLER_ERRORS = metrics.counter(
+    "vento_handler_errors_total", "Exceptions raised out of an aiogram handler", ("handler", "error")
+)
+OPENAI_LATENCY = metrics.histogram(
+    "vento_openai_request_duration_seconds",
+    "OpenAI request time, until the response headers for streams; excludes rate limiter queueing",
+    ("model", "endpoint"),
+)
+OPENAI_ERRORS = metrics.counter(
+    "vento_openai_errors_total", "Failed OpenAI requests", ("model", "endpoint", "error")
+)
+DB_STATEMENT_LATENCY = metrics.histogram(
+    "vento_db_statement_duration_seconds",
+    "Statement execution time on the connection, by verb and first table",
+    ("statement",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DB_STATEMENT_ERRORS = metrics.counter(
+    "vento_db_statement_errors_total", "Statements that raised, by verb and first table", ("statement",)
+)
+
+_STATEMENT_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+\"?(\w+)", re.IGNORECASE)
+# Statements are built once (see bot.repos), so the label map stays small; the cap guards against text() churn
+_MAX_STATEMENT_LABELS = 500
+_statement_labels: dict[str, str] = {}
+
+
+def statement_label(statement: str) -> str:
+    label = _statement_labels.get(statement)
+    if label is None:
+        verb = next(iter(statement.split(None, 1)), "").upper()
+        table = _STATEMENT_TABLE_RE.search(statement)
+        label = f"{verb} {table.group(1)}" if table else verb
+        if len(_statement_labels) < _MAX_STATEMENT_LABELS:
+            _statement_labels[statement] = label
+    return label
+
+
+@contextmanager
+def openai_call(model: str, endpoint: str) -> Iterator[None]:
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        OPENAI_ERRORS.labels(model, endpoint, type(e).__name__).inc()
+        raise
+    finally:
+        OPENAI_LATENCY.labels(model, endpoint).observe(time.perf_counter() - started_at)
+
+
+def timed_openai(model: str, endpoint: str, request: Callable[[], Awaitable[R]]) -> Callable[[], Awaitable[R]]:
+    """Wrap a rate limiter ``request`` so only the HTTP call itself is timed."""
+    async def timed() -> R:
+        with openai_call(model, endpoint), span(f"openai.{endpoint}", model=model):
+            return await request()
+    return timed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context.metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context.metrics_started_at
+    label = statement_label(statement)
+    DB_STATEMENT_LATENCY.labels(label).observe(elapsed)
+    # Also lands in the trace of the update running the statement, if any
+    end_ns = time.time_ns()
+    record("db", end_ns - int(elapsed * 1e9), end_ns, statement=label)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    if context.statement:
+        DB_STATEMENT_ERRORS.labels(statement_label(context.statement)).inc()
+
+
+def instrument_engine(engine: AsyncEngine | Engine) -> None:
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class MetricsServer:
+    """Serves ``GET /metrics`` from its own aiohttp server, apart from the webhook port."""
+
+    def __init__(self, host: str, port: int, registry: MetricsRegistry = metrics):
+        self._host = host
+        self._port = port
+        self._registry = registry
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self._host, port=self._port).start()
+        logger.info(f"Serving metrics on {self._host}:{self._port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self._registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+def register_stats(
+    name: str,
+    stats: Callable[[], Any],
+    label: str | None = None,
+    counters: Iterable[str] = (),
+) -> None:
+    metrics.register(StatsCollector(name, stats, label, counters))
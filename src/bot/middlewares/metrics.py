@@ -0,0 +1,51 @@
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from bot.metrics import HANDLER_ERRORS, HANDLER_LATENCY, UPDATE_LATENCY, UPDATES_IN_FLIGHT
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Counts updates in flight and times each one end to end, scheduler wait included."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        UPDATES_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATES_IN_FLIGHT.dec()
+            UPDATE_LATENCY.observe(time.perf_counter() - started_at)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Times the matched handler, labelled with its function name.
+
+    Registered as an inner middleware on the dispatcher's observers, which aiogram
+    applies to the handlers of every nested router.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject = data["handler"]
+        name = handler_object.callback.__name__
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(name).observe(time.perf_counter() - started_at)
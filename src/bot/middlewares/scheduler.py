@@ -0,0 +1,101 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import Chat, TelegramObject, User
+
+
+@dataclass
+class SchedulerStats:
+    running: int
+    waiting: int
+    busy_chats: int
+    max_chat_depth: int
+    processed: int
+    avg_wait: float
+    max_wait: float
+
+
+class _ChatQueue:
+    __slots__ = ("lock", "depth")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """Serializes updates per chat and bounds how many updates run at once.
+
+    Updates from the same chat wait on a FIFO lock, so each one sees the FSM history
+    written by the previous. Only the head of each chat queue competes for one of
+    ``max_concurrency`` global slots, so different chats run in parallel.
+    """
+
+    stats_counters = ("processed",)
+
+    def __init__(self, max_concurrency: int):
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[int, _ChatQueue] = {}
+        self._running = 0
+        self._waiting = 0
+        self._processed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        chat: Chat | None = data.get("event_chat")
+        user: User | None = data.get("event_from_user")
+        key = chat.id if chat else user.id if user else None
+
+        if key is None:
+            async with self._slots:
+                return await handler(event, data)
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _ChatQueue()
+        queue.depth += 1
+        self._waiting += 1
+        enqueued_at = time.monotonic()
+        started = False
+        try:
+            async with queue.lock, self._slots:
+                started = True
+                self._waiting -= 1
+                self._record_wait(time.monotonic() - enqueued_at)
+                self._running += 1
+                try:
+                    return await handler(event, data)
+                finally:
+                    self._running -= 1
+                    self._processed += 1
+        finally:
+            if not started:
+                self._waiting -= 1
+            queue.depth -= 1
+            if queue.depth == 0:
+                del self._queues[key]
+
+    def _record_wait(self, wait: float) -> None:
+        self._total_wait += wait
+        if wait > self._max_wait:
+            self._max_wait = wait
+
+    def stats(self) -> SchedulerStats:
+        return SchedulerStats(
+            running=self._running,
+            waiting=self._waiting,
+            busy_chats=len(self._queues),
+            max_chat_depth=max((q.depth for q in self._queues.values()), default=0),
+            processed=self._processed,
+            avg_wait=self._total_wait / self._processed if self._processed else 0.0,
+            max_wait=self._max_wait,
+        )
@@ -0,0 +1,71 @@
+import logging
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update, User
+
+from bot.utils.tracing import OtlpFileExporter, Trace, span, start_trace
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Opens a trace per update that services add spans to through ``contextvars``.
+
+    Updates slower than ``slow_threshold`` seconds are logged with the time spent per
+    span name. With an exporter configured, every finished trace is written out.
+    """
+
+    def __init__(self, slow_threshold: float, exporter: OtlpFileExporter | None = None):
+        self._slow_threshold = slow_threshold
+        self._exporter = exporter
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        attributes = {"user_id": user.id if user else None}
+        if isinstance(event, Update):
+            attributes.update(update_id=event.update_id, type=event.event_type)
+        trace = None
+        try:
+            with start_trace("update", **attributes) as trace:
+                return await handler(event, data)
+        finally:
+            if trace is not None:
+                self._finish(trace)
+
+    async def close(self) -> None:
+        if self._exporter is not None:
+            await self._exporter.close()
+
+    def _finish(self, trace: Trace) -> None:
+        root = trace.root
+        if root.duration >= self._slow_threshold:
+            fields = " ".join(f"{k}={v}" for k, v in root.attributes.items())
+            phases = " ".join(f"{name}={total:.3f}s/{count}" for name, total, count in trace.breakdown())
+            logger.warning(f"Slow update trace_id={trace.trace_id} {fields} total={root.duration:.3f}s {phases}")
+        if self._exporter is not None:
+            try:
+                self._exporter.export(trace)
+            except Exception:
+                logger.exception("Failed to export trace")
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """Adds a ``telegram.<method>`` span for every Bot API call made during an update."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Any:
+        with span(f"telegram.{method.__api_method__}"):
+            return await make_request(bot, method)
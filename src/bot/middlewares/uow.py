@@ -0,0 +1,40 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.interfaces.uow import AbcUnitOfWork
+
+_request_uow: ContextVar[AbcUnitOfWork | None] = ContextVar("request_uow", default=None)
+
+
+def request_uow(factory: Callable[[], AbcUnitOfWork]) -> AbcUnitOfWork:
+    """Unit of work of the update being handled, or a standalone one outside of updates."""
+    return _request_uow.get() or factory()
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """Shares one unit of work between every service used while handling an update.
+
+    Services keep their own ``async with`` blocks, which join the update's transaction
+    instead of opening a session each. The session is committed once when the handler
+    returns; nothing touches the database for updates that never run a statement.
+    """
+
+    def __init__(self, uow_factory: Callable[[], AbcUnitOfWork]):
+        self._uow_factory = uow_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        uow = self._uow_factory()
+        token = _request_uow.set(uow)
+        try:
+            async with uow:
+                return await handler(event, data)
+        finally:
+            _request_uow.reset(token)
@@ -1,7 +1,30 @@
 from abc import ABC
+from typing import Generic, Iterable, Sequence, TypeVar
 
+from pydantic import BaseModel
+from sqlalchemy import Column, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+Entity = TypeVar("Entity", bound=BaseModel)
+
+
+class RowMapper(Generic[Entity]):
+    """Maps Core rows of ``columns`` onto an entity with the entity's prebuilt validator.
+
+    Selecting plain columns skips ORM hydration and the identity map, and validating a
+    complete dict never runs the entity's default factories.
+    """
+
+    __slots__ = ("columns", "_keys", "_validate")
+
+    def __init__(self, entity: type[Entity], columns: Iterable[Column]):
+        self.columns: tuple[Column, ...] = tuple(columns)
+        self._keys = tuple(column.key for column in self.columns)
+        self._validate = entity.__pydantic_validator__.validate_python
+
+    def __call__(self, row: Row | Sequence) -> Entity:
+        return self._validate(dict(zip(self._keys, row)))
+
 
 class BaseRepo(ABC):
     def __init__(self, session: AsyncSession):
@@ -0,0 +1,41 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from bot.database.models import BonusRunOrm
+from bot.entities.bonus_run import BonusRunEntity
+from bot.interfaces.repos.base import DataMapper
+from bot.interfaces.repos.bonus_run import AbcBonusRunRepo
+from bot.repos.base import BaseRepo
+
+
+class BonusRunDataMapper(DataMapper):
+    def model_to_entity(self, instance: BonusRunOrm) -> BonusRunEntity:
+        return BonusRunEntity.model_validate(instance, from_attributes=True)
+
+
+class BonusRunRepo(AbcBonusRunRepo, BaseRepo):
+    _mapper_class = BonusRunDataMapper
+
+    async def get_or_create(self, key: str) -> BonusRunEntity:
+        await self.session.execute(insert(BonusRunOrm).values(key=key).on_conflict_do_nothing())
+        run = await self.session.scalar(select(BonusRunOrm).where(BonusRunOrm.key == key))
+        return self.map_model_to_entity(run)
+
+    async def advance(self, key: str, cursor: int, next_cursor: int, granted: int) -> bool:
+        stmt = (
+            update(BonusRunOrm)
+            .where(BonusRunOrm.key == key, BonusRunOrm.cursor == cursor)
+            .values(cursor=next_cursor, granted=BonusRunOrm.granted + granted, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount == 1
+
+    async def complete(self, key: str) -> None:
+        stmt = (
+            update(BonusRunOrm)
+            .where(BonusRunOrm.key == key)
+            .values(completed_at=func.now(), updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.execute(stmt)
@@ -1,10 +1,25 @@
-from sqlalchemy import insert, select
+from datetime import datetime
+
+from sqlalchemy import func, insert, lambda_stmt, select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from bot.database.models import LedgerOrm
+from bot.database.partitions import add_months, as_timestamp, current_month
 from bot.entities.ledger import LedgerEntity
 from bot.interfaces.repos.base import DataMapper
 from bot.interfaces.repos.ledger import AbcLedgerRepo
-from bot.repos.base import BaseRepo
+from bot.repos.base import BaseRepo, RowMapper
+
+
+# The current and the previous month, enough for the account screen in most cases
+RECENT_PARTITIONS = 2
+
+
+ledger = LedgerOrm.__table__
+ledger_row = RowMapper(LedgerEntity, ledger.columns)
+
+# Executed with a list of parameter sets, asyncpg prepares it once for the whole batch
+INSERT_ENTRY = insert(ledger)
 
 
 class LedgerDataMapper(DataMapper):
@@ -15,16 +30,73 @@ class LedgerDataMapper(DataMapper):
 class LedgerRepo(AbcLedgerRepo, BaseRepo):
     _mapper_class = LedgerDataMapper
 
-    async def add(self, entry: LedgerEntity) -> LedgerEntity:
-        stmt = insert(LedgerOrm).values(**entry.model_dump(exclude_none=True)).returning(LedgerOrm)
-        result = await self.session.execute(stmt)
-        row = result.scalar_one()
-        return self.map_model_to_entity(row)
+    async def add_many(self, entries: list[LedgerEntity]) -> None:
+        if not entries:
+            return
+        await self.session.execute(
+            INSERT_ENTRY, [entry.model_dump(exclude={"id", "updated_at"}) for entry in entries]
+        )
 
-    async def list_for_user(self, user_id: int, limit: int = 20) -> list[LedgerEntity]:
-        stmt = select(LedgerOrm).where(LedgerOrm.user_id == user_id).order_by(LedgerOrm.id.desc()).limit(limit)
-        result = await self.session.execute(stmt)
-        rows = result.scalars().all()
-        return [self.map_model_to_entity(r) for r in rows]
+    async def list_for_user(
+        self,
+        user_id: int,
+        before_id: int | None = None,
+        after_id: int | None = None,
+        limit: int = 20,
+    ) -> list[LedgerEntity]:
+        if after_id is not None:
+            return await self._page(user_id, None, after_id, limit)
+        # Newest-first pages are served from the current partitions when they have enough rows;
+        # ids grow with created_at, so older months can only hold smaller ids
+        since = as_timestamp(add_months(current_month(), 1 - RECENT_PARTITIONS))
+        rows = await self._page(user_id, before_id, None, limit, since=since)
+        if len(rows) < limit:
+            older_than = rows[-1].id if rows else before_id
+            rows += await self._page(user_id, older_than, None, limit - len(rows), until=since)
+        return rows
 
+    async def _page(
+        self,
+        user_id: int,
+        before_id: int | None,
+        after_id: int | None,
+        limit: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[LedgerEntity]:
+        stmt = self._page_statement(user_id, before_id, after_id, limit, since, until)
+        rows = (await self.session.execute(stmt)).all()
+        if after_id is not None:
+            rows = rows[::-1]
+        return [ledger_row(r) for r in rows]
 
+    @staticmethod
+    def _page_statement(
+        user_id: int,
+        before_id: int | None,
+        after_id: int | None,
+        limit: int,
+        since: datetime | None,
+        until: datetime | None,
+    ) -> StatementLambdaElement:
+        # Each combination of filters is one cached statement, the values are bound parameters
+        stmt = lambda_stmt(lambda: select(*ledger_row.columns).where(ledger.c.user_id == user_id).limit(limit))
+        if since is not None:
+            stmt += lambda s: s.where(ledger.c.created_at >= since)
+        if until is not None:
+            stmt += lambda s: s.where(ledger.c.created_at < until)
+        if after_id is not None:
+            # Nothing after the cursor is older than the cursor's month; Postgres prunes the
+            # partitions before it at execution time, once the subquery is evaluated
+            stmt += lambda s: s.where(ledger.c.created_at >= func.date_trunc("month", (
+                select(ledger.c.created_at)
+                .where(ledger.c.user_id == user_id, ledger.c.id == after_id)
+                .scalar_subquery()
+            )))
+            # Walk up from the cursor so the page is the entries right after it
+            stmt += lambda s: s.where(ledger.c.id > after_id).order_by(ledger.c.id.asc())
+        else:
+            if before_id is not None:
+                stmt += lambda s: s.where(ledger.c.id < before_id)
+            stmt += lambda s: s.order_by(ledger.c.id.desc())
+        return stmt
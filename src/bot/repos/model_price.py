@@ -1,10 +1,17 @@
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 
 from bot.database.models import PriceOrm
 from bot.entities.model_price import PriceEntity
 from bot.interfaces.repos.base import DataMapper
 from bot.interfaces.repos.model_price import AbcPriceRepo
-from bot.repos.base import BaseRepo
+from bot.repos.base import BaseRepo, RowMapper
+
+
+prices = PriceOrm.__table__
+price_row = RowMapper(PriceEntity, prices.columns)
+
+SELECT_BY_KEY = select(*price_row.columns).where(prices.c.key == bindparam("key")).limit(1)
+SELECT_ALL = select(*price_row.columns)
 
 
 class PriceDataMapper(DataMapper):
@@ -16,6 +23,9 @@ class PriceRepo(AbcPriceRepo, BaseRepo):
     _mapper_class = PriceDataMapper
 
     async def get_by_key(self, key: str) -> PriceEntity | None:
-        stmt = select(PriceOrm).filter_by(key=key).limit(1)
-        instance = await self.session.scalar(stmt)
-        return self.map_model_to_entity(instance) if instance else None
+        row = (await self.session.execute(SELECT_BY_KEY, {"key": key})).first()
+        return price_row(row) if row else None
+
+    async def list_all(self) -> list[PriceEntity]:
+        result = await self.session.execute(SELECT_ALL)
+        return [price_row(r) for r in result.all()]
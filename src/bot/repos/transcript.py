@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from bot.database.models import TranscriptOrm
+from bot.entities.transcript import TranscriptEntity
+from bot.interfaces.repos.base import DataMapper
+from bot.interfaces.repos.transcript import AbcTranscriptRepo
+from bot.repos.base import BaseRepo
+
+
+class TranscriptDataMapper(DataMapper):
+    def model_to_entity(self, instance: TranscriptOrm) -> TranscriptEntity:
+        return TranscriptEntity.model_validate(instance, from_attributes=True)
+
+
+class TranscriptRepo(AbcTranscriptRepo, BaseRepo):
+    _mapper_class = TranscriptDataMapper
+
+    async def get_any(self, keys: list[str], newer_than: datetime) -> TranscriptEntity | None:
+        stmt = (
+            select(TranscriptOrm)
+            .where(TranscriptOrm.key.in_(keys), TranscriptOrm.updated_at > newer_than)
+            .order_by(TranscriptOrm.updated_at.desc())
+            .limit(1)
+        )
+        instance = await self.session.scalar(stmt)
+        return self.map_model_to_entity(instance) if instance else None
+
+    async def upsert(self, keys: list[str], text: str) -> None:
+        stmt = insert(TranscriptOrm).values([{"key": key, "text": text} for key in keys])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TranscriptOrm.key],
+            set_={"text": stmt.excluded.text, "updated_at": func.now()},
+        )
+        await self.session.execute(stmt)
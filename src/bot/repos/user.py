@@ -1,10 +1,48 @@
-from sqlalchemy import select, insert, update
+from sqlalchemy import String, bindparam, select, insert, update, func, literal
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database.models import UserOrm
+from bot.database.models import LedgerOrm, UserOrm
+from bot.database.user_cache import USER_CHANGED_CHANNEL, USERS_RESET, UserCache
 from bot.entities.user import UserEntity, UserDTO
 from bot.interfaces.repos.base import DataMapper
 from bot.interfaces.repos.user import AbcUserRepo
-from bot.repos.base import BaseRepo
+from bot.repos.base import BaseRepo, RowMapper
+
+users = UserOrm.__table__
+user_row = RowMapper(UserEntity, users.columns)
+
+# Hot statements are built once with bound parameters, so every call hits SQLAlchemy's
+# compiled cache and asyncpg's prepared statement cache with the same SQL text. UPDATE
+# parameters must not be named after a column, hence ``b_telegram_id``. ``updated_at`` is
+# the time of the write rather than of the transaction start, the user cache orders
+# versions of a row by it
+SELECT_BY_TELEGRAM_ID = select(*user_row.columns).where(users.c.telegram_id == bindparam("telegram_id")).limit(1)
+INSERT_USER = insert(users).returning(*user_row.columns)
+ADD_BALANCE_BY_TELEGRAM_ID = (
+    update(users)
+    .where(users.c.telegram_id == bindparam("b_telegram_id"))
+    .values(balance=users.c.balance + bindparam("delta"), updated_at=func.clock_timestamp())
+    .returning(*user_row.columns)
+)
+ADD_BALANCE_BY_ID = (
+    update(users)
+    .where(users.c.id == bindparam("user_id"))
+    .values(balance=users.c.balance + bindparam("delta"), updated_at=func.clock_timestamp())
+    .returning(*user_row.columns)
+)
+DEBIT = (
+    update(users)
+    .where(users.c.telegram_id == bindparam("b_telegram_id"), users.c.balance >= bindparam("amount"))
+    .values(balance=users.c.balance - bindparam("amount"), updated_at=func.clock_timestamp())
+    .returning(*user_row.columns)
+)
+# Silences the per-row users trigger for this transaction and has every replica drop its
+# user cache once it commits, instead of one notification per granted user
+BULK_UPDATE = select(
+    func.set_config("vento.bulk_user_update", "on", True),
+    func.pg_notify(USER_CHANGED_CHANNEL, USERS_RESET),
+)
 
 
 class UserDataMapper(DataMapper):
@@ -15,40 +53,75 @@ class UserDataMapper(DataMapper):
 class UserRepo(AbcUserRepo, BaseRepo):
     _mapper_class = UserDataMapper
 
+    def __init__(self, session: AsyncSession, cache: UserCache | None = None):
+        super().__init__(session)
+        self._cache = cache
+        # Rows read or written in this transaction, written through once it commits
+        self.pending: dict[int, UserEntity] = {}
+
+    def _cached(self, telegram_id: int) -> UserEntity | None:
+        if self._cache is None:
+            return None
+        return self.pending.get(telegram_id) or self._cache.get(telegram_id)
+
+    def _track(self, row: Row | None) -> UserEntity | None:
+        if row is None:
+            return None
+        user = user_row(row)
+        if self._cache is not None:
+            if user.telegram_id not in self.pending:
+                self._cache.watch(user.telegram_id)
+            self.pending[user.telegram_id] = user
+        return user
+
     async def get_or_create(self, user_data: UserDTO) -> tuple[UserEntity, bool]:
-        stmt = select(UserOrm).filter_by(telegram_id=user_data.telegram_id).limit(1)
-        user = await self.session.scalar(stmt)
-        if user:
-            return self.map_model_to_entity(user), False
+        if cached := self._cached(user_data.telegram_id):
+            return cached, False
+        result = await self.session.execute(SELECT_BY_TELEGRAM_ID, {"telegram_id": user_data.telegram_id})
+        if row := result.first():
+            return self._track(row), False
 
-        stmt = insert(UserOrm).values(**user_data.model_dump(exclude_none=True)).returning(UserOrm)
-        result = await self.session.execute(stmt)
-        user = result.scalar_one()
-        return self.map_model_to_entity(user), True
+        result = await self.session.execute(INSERT_USER, user_data.model_dump(exclude_none=True))
+        return self._track(result.one()), True
 
     async def get_by_telegram_id(self, telegram_id: int) -> UserEntity | None:
-        stmt = select(UserOrm).filter_by(telegram_id=telegram_id).limit(1)
-        user = await self.session.scalar(stmt)
-        return self.map_model_to_entity(user) if user else None
+        if cached := self._cached(telegram_id):
+            return cached
+        result = await self.session.execute(SELECT_BY_TELEGRAM_ID, {"telegram_id": telegram_id})
+        return self._track(result.first())
 
     async def update_balance_by_telegram_id(self, telegram_id: int, delta: int) -> UserEntity | None:
-        stmt = (
-            update(UserOrm)
-            .where(UserOrm.telegram_id == telegram_id)
-            .values(balance=UserOrm.balance + delta)
-            .returning(UserOrm)
-        )
-        result = await self.session.execute(stmt)
-        user = result.scalar_one_or_none()
-        return self.map_model_to_entity(user) if user else None
+        result = await self.session.execute(ADD_BALANCE_BY_TELEGRAM_ID, {"b_telegram_id": telegram_id, "delta": delta})
+        return self._track(result.one_or_none())
 
     async def update_balance_by_user_id(self, user_id: int, delta: int) -> UserEntity | None:
-        stmt = (
+        result = await self.session.execute(ADD_BALANCE_BY_ID, {"user_id": user_id, "delta": delta})
+        return self._track(result.one_or_none())
+
+    async def max_id(self) -> int:
+        return await self.session.scalar(select(func.coalesce(func.max(UserOrm.id), 0)))
+
+    async def grant_bonus(self, id_from: int, id_to: int, amount: int, reason: str, meta: str | None = None) -> int:
+        await self.session.execute(BULK_UPDATE)
+        granted = (
             update(UserOrm)
-            .where(UserOrm.id == user_id)
-            .values(balance=UserOrm.balance + delta)
-            .returning(UserOrm)
+            .where(UserOrm.id >= id_from, UserOrm.id < id_to)
+            .values(balance=UserOrm.balance + amount, updated_at=func.clock_timestamp())
+            .returning(UserOrm.id)
+            .cte("granted")
         )
-        result = await self.session.execute(stmt)
-        user = result.scalar_one_or_none()
-        return self.map_model_to_entity(user) if user else None
+        ledger_entries = (
+            insert(LedgerOrm)
+            .from_select(
+                ["user_id", "delta", "reason", "meta"],
+                select(granted.c.id, literal(amount), literal(reason, String), literal(meta, String)),
+                include_defaults=False,
+            )
+            .cte("ledger_entries")
+        )
+        stmt = select(func.count()).select_from(granted).add_cte(ledger_entries)
+        return await self.session.scalar(stmt)
+
+    async def debit(self, telegram_id: int, amount: int) -> UserEntity | None:
+        result = await self.session.execute(DEBIT, {"b_telegram_id": telegram_id, "amount": amount})
+        return self._track(result.one_or_none())
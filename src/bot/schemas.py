@@ -4,3 +4,5 @@ from pydantic import BaseModel
 class GPTMessageResponse(BaseModel):
     text: str | None = None
     image_url: str | None = None
+    # Set on fresh DALL·E images so the sent photo's file_id can be cached under it
+    cache_key: str | None = None
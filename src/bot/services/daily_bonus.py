@@ -0,0 +1,73 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable
+
+from bot.errors import BonusRunConflictError
+from bot.interfaces.uow import AbcUnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BonusProgress:
+    key: str
+    cursor: int
+    last_id: int
+    granted: int
+    rate: float
+    completed: bool = False
+
+
+class DailyBonusJob:
+    """Grants the daily bonus to every user with set-based statements.
+
+    Users are walked in id ranges of ``chunk_size``. Each chunk is one transaction with
+    a single UPDATE + ledger INSERT statement and the move of the run cursor, which is
+    stored per day in ``bonus_runs``. A crashed run resumes from its cursor and a
+    finished one is a no-op; a second worker on the same day fails on the first chunk
+    it shares instead of granting twice.
+    """
+
+    def __init__(self, uow_factory: Callable[[], AbcUnitOfWork], amount: int, chunk_size: int):
+        self._uow_factory = uow_factory
+        self._amount = amount
+        self._chunk_size = chunk_size
+
+    @staticmethod
+    def run_key(day: date) -> str:
+        return f"daily-bonus:{day.isoformat()}"
+
+    async def run(self, day: date, on_progress: Callable[[BonusProgress], None] | None = None) -> BonusProgress:
+        key = self.run_key(day)
+        async with self._uow_factory() as uow:
+            run = await uow.bonus_run.get_or_create(key)
+            last_id = await uow.user.max_id()
+
+        progress = BonusProgress(key=key, cursor=run.cursor, last_id=last_id, granted=run.granted, rate=0.0)
+        if run.completed_at is not None:
+            progress.completed = True
+            return progress
+
+        started_at = time.monotonic()
+        granted_now = 0
+        while progress.cursor <= last_id:
+            next_cursor = progress.cursor + self._chunk_size
+            async with self._uow_factory() as uow:
+                granted = await uow.user.grant_bonus(progress.cursor, next_cursor, self._amount, "daily bonus", key)
+                if not await uow.bonus_run.advance(key, progress.cursor, next_cursor, granted):
+                    raise BonusRunConflictError(key)
+
+            granted_now += granted
+            progress.cursor = next_cursor
+            progress.granted += granted
+            progress.rate = granted_now / max(time.monotonic() - started_at, 1e-9)
+            if on_progress:
+                on_progress(progress)
+
+        async with self._uow_factory() as uow:
+            await uow.bonus_run.complete(key)
+        progress.completed = True
+        logger.info(f"Daily bonus {key} granted to {progress.granted} users")
+        return progress
@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import logging
+import mmap
+import os
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import aiofiles
+from aiogram import Bot
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from openai.types.chat import ChatCompletionMessageParam
+
+from bot.interfaces.services.files import AbcTelegramFileService
+from bot.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+IMAGE_REF_SCHEME = "tg-file"
+CHUNK_SIZE = 64 * 1024
+
+
+class TelegramFileService(AbcTelegramFileService):
+    """Downloads Telegram files through one pooled HTTP session into a bounded disk cache.
+
+    Files are keyed by ``file_unique_id``, which is stable across forwards and bots, so
+    the same media is downloaded once. The least recently used files are removed once
+    the cache exceeds ``max_cache_bytes``.
+    """
+
+    def __init__(self, cache_dir: str, max_cache_bytes: int, max_connections: int):
+        self._cache_dir = Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_cache_bytes = max_cache_bytes
+        self._max_connections = max_connections
+        self._session: ClientSession | None = None
+        self._downloads: dict[str, asyncio.Future[Path]] = {}
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        for path in sorted(self._cache_dir.iterdir(), key=lambda p: p.stat().st_mtime):
+            if path.is_file() and not path.name.endswith(".part"):
+                self._entries[path.name] = path.stat().st_size
+                self._size += self._entries[path.name]
+
+    async def fetch(self, bot: Bot, file_id: str, file_unique_id: str) -> Path:
+        if file_unique_id in self._entries:
+            self._entries.move_to_end(file_unique_id)
+            return self._cache_dir / file_unique_id
+
+        # Concurrent requests for the same file share one download
+        if pending := self._downloads.get(file_unique_id):
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._downloads[file_unique_id] = future
+        try:
+            path = await self._download(bot, file_id, file_unique_id)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved, waiters re-raise it themselves
+            raise
+        finally:
+            del self._downloads[file_unique_id]
+
+    async def read(self, bot: Bot, file_id: str, file_unique_id: str) -> memoryview:
+        cached = file_unique_id in self._entries
+        path = await self.fetch(bot, file_id, file_unique_id)
+        if cached and path.stat().st_size == 0:
+            # Do not trust an empty cached copy, download it once more
+            self._drop(file_unique_id)
+            path = await self.fetch(bot, file_id, file_unique_id)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap cannot map an empty file
+                return memoryview(b"")
+            # The mapping stays valid even if the file is evicted afterwards
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def image_ref(self, file_id: str, file_unique_id: str) -> str:
+        return f"{IMAGE_REF_SCHEME}://{file_unique_id}?file_id={file_id}"
+
+    async def resolve_image_refs(self, bot: Bot, messages: list[ChatCompletionMessageParam]) -> list[ChatCompletionMessageParam]:
+        resolved = []
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str) or not content or not any(self._is_ref(p) for p in content):
+                resolved.append(message)
+                continue
+            parts = []
+            for part in content:
+                if self._is_ref(part):
+                    part = {**part, "image_url": {**part["image_url"], "url": await self._data_url(bot, part["image_url"]["url"])}}
+                parts.append(part)
+            resolved.append({**message, "content": parts})
+        return resolved
+
+    async def close(self) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    @staticmethod
+    def _is_ref(part: dict) -> bool:
+        return part.get("type") == "image_url" and part["image_url"]["url"].startswith(f"{IMAGE_REF_SCHEME}://")
+
+    async def _data_url(self, bot: Bot, ref: str) -> str:
+        url = urlsplit(ref)
+        data = await self.read(bot, parse_qs(url.query)["file_id"][0], url.netloc)
+        try:
+            # Telegram re-encodes every photo as JPEG
+            return f"data:image/jpeg;base64,{base64.b64encode(data).decode()}"
+        finally:
+            data.release()
+
+    def _get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(limit=self._max_connections, keepalive_timeout=60),
+                timeout=ClientTimeout(total=120),
+            )
+        return self._session
+
+    async def _download(self, bot: Bot, file_id: str, file_unique_id: str) -> Path:
+        file = await bot.get_file(file_id)
+        url = bot.session.api.file_url(bot.token, file.file_path)
+        path = self._cache_dir / file_unique_id
+        tmp_path = path.with_name(f"{file_unique_id}.part")
+
+        size = 0
+        with span("telegram.file_download") as download:
+            async with self._get_session().get(url) as resp:
+                resp.raise_for_status()
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        await f.write(chunk)
+            if download is not None:
+                download.attributes["bytes"] = size
+        os.replace(tmp_path, path)
+
+        self._entries[file_unique_id] = size
+        self._size += size
+        self._evict()
+        logger.debug(f"Cached Telegram file {file_unique_id} ({size} bytes)")
+        return path
+
+    def _evict(self) -> None:
+        while self._size > self._max_cache_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, name: str) -> None:
+        self._size -= self._entries.pop(name)
+        try:
+            (self._cache_dir / name).unlink()
+        except FileNotFoundError:
+            pass
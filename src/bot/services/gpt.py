@@ -1,18 +1,29 @@
+import hashlib
 import logging
-import re
+import time
+from typing import AsyncIterator
 
-from aiohttp import ClientSession
+from aiogram import Bot
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
+from aiogram.types import Message, Voice
 from openai import OpenAI as OpenAIClient
 from openai import BadRequestError as OpenAIInvalidRequestError
 from openai.types import ImagesResponse
 
-from bot.enums import BotModeEnum
-from bot.errors import OpenAIBadRequestError, InsufficientBalanceError
+from bot.entities.ledger import LedgerEntity
+from bot.enums import BotModeEnum, OpenAIPriorityEnum
+from bot.errors import EmptyPromptError, OpenAIBadRequestError, InsufficientBalanceError, OpenAIRateLimitedError
+from bot.interfaces.services.files import AbcTelegramFileService
 from bot.interfaces.services.gpt import AbcOpenAIService
 from bot.interfaces.services.pricing import AbcPricingService
 from bot.interfaces.uow import AbcUnitOfWork
+from bot.metrics import timed_openai
+from bot.services.ledger_writer import LedgerWriter
+from bot.services.history import ConversationHistory, HistorySummarizer, ImageRetentionPolicy, message_text
+from bot.services.rate_limiter import OpenAIRateLimiter
+from bot.services.response_cache import ResponseCache
+from bot.services.transcripts import TranscriptCache
+from bot.settings import HistorySettings
 from openai.types.chat import (
     ChatCompletionUserMessageParam,
     ChatCompletionAssistantMessageParam, ChatCompletionMessageParam, ChatCompletionContentPartTextParam,
@@ -20,210 +31,304 @@ from openai.types.chat import (
 )
 
 from bot.schemas import GPTMessageResponse
+from bot.utils.image_intent import image_intent_detector
+from bot.utils.tokens import count_prompt_tokens
+from bot.utils.tracing import record
 
-IMAGE_PROMPT_PATTERNS = [
-    r"(?:^|\s)!draw\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)сгенерируй\s*(?:картинку|изображение)?\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)создай\s*(?:картинку|изображение)?\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)нарисуй\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)хочу\s*(?:увидеть|получить)?\s*(?:картинку|изображение)?\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)покажи\s*(?:мне)?\s*(?:рисунок|арт|картинку)\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)изобрази\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)(?:придумай|представь)\s*(?:и)?\s*(?:сделай|покажи)?\s*(?:картинку|сцену|изображение)\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)generate\s*(?:an? )?(?:image|picture|art)\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)draw\s*(?:me)?\s*[:\-]?\s*(.+)",
-    r"(?:^|\s)make\s*(?:a|an)?\s*(?:image|picture|drawing)\s*[:\-]?\s*(.+)",
-]
-
-IMAGE_EXCLUDE_KEYWORDS = [
-    "словами", "опиши", "текстом", "расскажи", "в виде текста"
-]
+# Paid models are admitted ahead of free traffic when OpenAI limits are tight
+MODEL_PRIORITIES = {
+    "gpt-5": OpenAIPriorityEnum.high,
+    "dall-e-3": OpenAIPriorityEnum.high,
+}
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService(AbcOpenAIService):
-    def __init__(self, uow: AbcUnitOfWork, client: OpenAIClient, pricing_service: AbcPricingService):
+    def __init__(
+        self,
+        uow: AbcUnitOfWork,
+        client: OpenAIClient,
+        pricing_service: AbcPricingService,
+        rate_limiter: OpenAIRateLimiter,
+        summarizer: HistorySummarizer,
+        image_retention: ImageRetentionPolicy,
+        history_settings: HistorySettings,
+        file_service: AbcTelegramFileService,
+        transcripts: TranscriptCache,
+        response_cache: ResponseCache,
+        ledger_writer: LedgerWriter,
+    ):
         self._uow = uow
         self._client = client
+        self._rate_limiter = rate_limiter
+        self._summarizer = summarizer
+        self._image_retention = image_retention
+        self._history_settings = history_settings
+        self._file_service = file_service
+        self._transcripts = transcripts
+        self._response_cache = response_cache
+        self._ledger_writer = ledger_writer
         self._pricing_service = pricing_service
         self._gpt5_price_tokens = 5
 
     async def process_gpt_request(self, message: Message, state: FSMContext) -> GPTMessageResponse:
-        history: list[ChatCompletionMessageParam] = (await state.get_data()).get("history", [])
-
+        image = None
+        parts: list[str] = []
+        async for chunk in self.stream_gpt_request(message, state):
+            if chunk.image_url:
+                image = chunk
+            elif chunk.text:
+                parts.append(chunk.text)
+        if image:
+            return image
+        return GPTMessageResponse(text="".join(parts))
+
+    async def stream_gpt_request(self, message: Message, state: FSMContext) -> AsyncIterator[GPTMessageResponse]:
+        state_data = await state.get_data()
+        history = ConversationHistory(state_data)
+
+        # Determine model and charge atomically, falling back to mini if GPT-5 is unaffordable
+        prices = await self._pricing_service.get_prices([BotModeEnum.gpt5, BotModeEnum.gpt5_mini])
         async with self._uow:
-            user = await self._uow.user.get_by_telegram_id(message.from_user.id)
-            # Determine model and charge
-            gpt5_price = await self._pricing_service.get_price_for_mode(BotModeEnum.gpt5)
-            mini_price = await self._pricing_service.get_price_for_mode(BotModeEnum.gpt5_mini)
-            if user.balance >= gpt5_price:
-                gpt_model = "gpt-5"
-                charge = gpt5_price
-                reason = "gpt-5 request"
-            elif user.balance >= mini_price:
-                gpt_model = "gpt-5-mini"
-                charge = mini_price
-                reason = "gpt-5-mini request"
-            else:
+            gpt_model, price = "gpt-5", prices[BotModeEnum.gpt5]
+            user = await self._uow.user.debit(message.from_user.id, price)
+            if user is None:
+                gpt_model, price = "gpt-5-mini", prices[BotModeEnum.gpt5_mini]
+                user = await self._uow.user.debit(message.from_user.id, price)
+            if user is None:
                 raise InsufficientBalanceError
+            # Settle the charge now rather than at the end of the update, so no connection
+            # stays checked out while the model streams
+            await self._uow.commit()
+        self._ledger_writer.enqueue(
+            LedgerEntity(user_id=user.id, delta=-price, reason=f"{gpt_model} request", meta=message.text)
+        )
 
-            # If user intended GPT-5 but we have to use mini, notify and switch FSM mode
-            state_mode = (await state.get_data()).get("mode")
-            if state_mode == BotModeEnum.gpt5 and gpt_model == "gpt-5-mini":
-                await state.update_data(mode=BotModeEnum.gpt5_mini)
-                await message.answer("ℹ️ Недостаточно токенов для GPT‑5 — переключаю на GPT‑5 Mini.")
-
-            # Charge now atomically and write ledger
-            updated_user = await self._uow.user.update_balance_by_user_id(user.id, -charge)
-            from bot.entities.ledger import LedgerEntity
-            await self._uow.ledger.add(LedgerEntity(user_id=user.id, delta=-charge, reason=reason, meta=message.text))
-            user = updated_user if updated_user else user
-
-        
+        # If user intended GPT-5 but we have to use mini, notify and switch FSM mode
+        state_mode = state_data.get("mode")
+        if state_mode == BotModeEnum.gpt5 and gpt_model == "gpt-5-mini":
+            await state.update_data(mode=BotModeEnum.gpt5_mini)
+            await message.answer("ℹ️ Недостаточно токенов для GPT‑5 — переключаю на GPT‑5 Mini.")
 
         if message.photo:
-            response = await self._handle_photo(message, history, gpt_model)
+            chunks = self._handle_photo(message, history.messages, gpt_model)
 
         elif message.voice:
-            response = await self._handle_voice(message, history, gpt_model)
+            chunks = self._handle_voice(message, history.messages, gpt_model)
 
         else:
-            response = await self._handle_text(message, history, gpt_model)
-
-        await state.update_data(history=history[-10:])
+            chunks = self._handle_text(message, history.messages, gpt_model)
 
-        return response
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except OpenAIRateLimitedError:
+            await self._refund(message.from_user.id, price, f"{gpt_model} request", message.text)
+            raise
+
+        budget = self._history_settings.TOKEN_BUDGETS.get(gpt_model, self._history_settings.DEFAULT_TOKEN_BUDGET)
+        self._image_retention.apply(history, gpt_model)
+        evicted = history.trim(budget)
+        await state.update_data(**history.to_state())
+        self._summarizer.schedule(state, evicted)
 
     async def process_dalle_request(self, message: Message, history: list[ChatCompletionMessageParam] | None = None):
+        # Photos, voice notes and stickers carry no prompt, reject them before charging
+        if not message.text or not message.text.strip():
+            raise EmptyPromptError
         # Ensure balance and charge
+        dalle_price = await self._pricing_service.get_price_for_mode(BotModeEnum.dalle3)
         async with self._uow:
-            user = await self._uow.user.get_by_telegram_id(message.from_user.id)
-            dalle_price = await self._pricing_service.get_price_for_mode(BotModeEnum.dalle3)
-            if user.balance < dalle_price:
+            user = await self._uow.user.debit(message.from_user.id, dalle_price)
+            if user is None:
                 raise InsufficientBalanceError
-            user.balance -= dalle_price
-            from bot.entities.ledger import LedgerEntity
-            await self._uow.ledger.add(LedgerEntity(user_id=user.id, delta=-dalle_price, reason="dalle3 image", meta=message.text))
+            await self._uow.commit()
+        self._ledger_writer.enqueue(
+            LedgerEntity(user_id=user.id, delta=-dalle_price, reason="dalle3 image", meta=message.text)
+        )
+
+        # The image depends on the prompt alone, so a cached photo is valid whatever the history
+        cache_key = self._response_cache.key("dall-e-3", message.text, []) if self._response_cache.enabled else None
+        if cache_key and (file_id := self._response_cache.get(cache_key)) is not None:
+            self._response_cache.record_saving(images=1)
+            self._append_image_turn(history, message.text, file_id)
+            return GPTMessageResponse(image_url=file_id)
 
         try:
-            response: ImagesResponse = await self._client.images.generate(
-                model="dall-e-3",
-                prompt=message.text,
-                size="1024x1024",
-                quality="standard",
-                response_format="url",
-                n=1,
+            response: ImagesResponse = await self._rate_limiter.call(
+                "dall-e-3",
+                tokens=0,
+                priority=MODEL_PRIORITIES.get("dall-e-3", OpenAIPriorityEnum.normal),
+                request=timed_openai("dall-e-3", "images.generate", lambda: self._client.images.with_raw_response.generate(
+                    model="dall-e-3",
+                    prompt=message.text,
+                    size="1024x1024",
+                    quality="standard",
+                    response_format="url",
+                    n=1,
+                )),
             )
         except OpenAIInvalidRequestError:
             raise OpenAIBadRequestError
+        except OpenAIRateLimitedError:
+            await self._refund(message.from_user.id, dalle_price, "dalle3 image", message.text)
+            raise
 
         image_result_url = response.data[0].url
-        if history is not None:
-            history.append(
-                ChatCompletionUserMessageParam(
-                    role="user",
-                    content=[ChatCompletionContentPartTextParam(type="text", text=message.text)],
-                )
+        self._append_image_turn(history, message.text, image_result_url)
+        return GPTMessageResponse(image_url=image_result_url, cache_key=cache_key)
+
+    async def _refund(self, telegram_id: int, amount: int, reason: str, meta: str | None) -> None:
+        async with self._uow:
+            user = await self._uow.user.update_balance_by_telegram_id(telegram_id, amount)
+            await self._uow.commit()
+        if user is not None:
+            self._ledger_writer.enqueue(LedgerEntity(user_id=user.id, delta=amount, reason=f"{reason} refund", meta=meta))
+
+    def remember_image(self, response: GPTMessageResponse, file_id: str) -> None:
+        # OpenAI image URLs expire, the uploaded photo's file_id does not
+        if response.cache_key:
+            self._response_cache.put(response.cache_key, file_id)
+
+    @staticmethod
+    def _append_image_turn(history: list[ChatCompletionMessageParam] | None, prompt: str, image: str) -> None:
+        if history is None:
+            return
+        history.append(
+            ChatCompletionUserMessageParam(
+                role="user",
+                content=[ChatCompletionContentPartTextParam(type="text", text=prompt)],
             )
-            history.append(
-                ChatCompletionAssistantMessageParam(
-                    role="assistant",
-                    content=[
-                        ChatCompletionContentPartTextParam(type="text", text=image_result_url)],
-                )
+        )
+        history.append(
+            ChatCompletionAssistantMessageParam(
+                role="assistant",
+                content=[
+                    ChatCompletionContentPartTextParam(type="text", text=image)],
             )
+        )
 
-        return GPTMessageResponse(image_url=image_result_url)
+    async def _transcribe_audio(self, bot: Bot, voice: Voice) -> str:
+        # Forwarded and re-sent voice notes keep their file_unique_id, no download needed
+        file_key = self._transcripts.file_key(voice.file_unique_id)
+        if (text := await self._transcripts.get(file_key, count_miss=False)) is not None:
+            return text
 
-    async def _transcribe_audio(self, url: str) -> str:
-        async with ClientSession() as session:
-            async with session.get(url) as resp:
-                audio_bytes = await resp.read()
+        audio = await self._file_service.read(bot, voice.file_id, voice.file_unique_id)
+        try:
+            keys = [file_key, self._transcripts.audio_key(hashlib.sha256(audio).hexdigest())]
+        finally:
+            audio.release()
+        # The same audio sent as a new file; a hit fills in the file key too
+        if (text := await self._transcripts.get(*keys)) is not None:
+            return text
+
+        path = await self._file_service.fetch(bot, voice.file_id, voice.file_unique_id)
+
+        with open(path, "rb") as audio_file:
+            def transcribe():
+                # A retried request uploads the file again from the start
+                audio_file.seek(0)
+                return self._client.audio.transcriptions.with_raw_response.create(
+                    model="whisper-1",
+                    file=("voice.ogg", audio_file, "audio/ogg")
+                )
 
-        transcript = await self._client.audio.transcriptions.create(
-            model="whisper-1",
-            file=("voice.ogg", audio_bytes, "audio/ogg")
-        )
+            transcript = await self._rate_limiter.call(
+                "whisper-1",
+                tokens=0,
+                priority=MODEL_PRIORITIES.get("whisper-1", OpenAIPriorityEnum.normal),
+                request=timed_openai("whisper-1", "audio.transcriptions", transcribe),
+            )
+        await self._transcripts.put(keys, transcript.text)
         return transcript.text
 
     @staticmethod
     def _parse_image_prompt(text: str) -> str | None:
-        if any(kw in text.lower() for kw in IMAGE_EXCLUDE_KEYWORDS):
-            return None
-
-        for pattern in IMAGE_PROMPT_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                groups = match.groups()
-                return next((g for g in groups if g), None)
-        return None
+        intent = image_intent_detector.detect(text)
+        return intent.prompt if intent else None
 
+    async def _stream_completion(self, bot: Bot, history: list[ChatCompletionMessageParam], model: str) -> AsyncIterator[str]:
+        messages = await self._file_service.resolve_image_refs(bot, history)
+        try:
+            stream = await self._rate_limiter.call(
+                model,
+                tokens=count_prompt_tokens(history),
+                priority=MODEL_PRIORITIES.get(model, OpenAIPriorityEnum.normal),
+                request=timed_openai(model, "chat.completions", lambda: self._client.chat.completions.with_raw_response.create(
+                    model=model,
+                    messages=messages,
+                    stream=True,
+                )),
+            )
+        except OpenAIInvalidRequestError:
+            raise OpenAIBadRequestError
 
-    async def _handle_photo(self, message: Message, history, model: str):
+        # Spans cannot stay open across the yields below, the stream is recorded once drained
+        stream_started_ns = time.time_ns()
+        parts: list[str] = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+
+        record("openai.stream", stream_started_ns, model=model)
+        history.append(ChatCompletionAssistantMessageParam(role="assistant", content="".join(parts)))
+
+    async def _handle_photo(self, message: Message, history, model: str) -> AsyncIterator[GPTMessageResponse]:
         photo = message.photo[-1]
-        file = await message.bot.get_file(photo.file_id)
-        url = f"https://api.telegram.org/file/bot{message.bot.token}/{file.file_path}"
         if image_prompt := self._parse_image_prompt(message.caption) if message.caption else None:
             logger.info(f"Detected image generation prompt: {image_prompt}")
             text_message = Message(**{**message.model_dump(), "text": image_prompt})
             # Delegate to DALL·E generation; it will handle balance charging and history
-            return await self.process_dalle_request(text_message, history)
+            yield await self.process_dalle_request(text_message, history)
         else:
             history.append(
                 ChatCompletionUserMessageParam(
                     role="user",
                     content=[
                         ChatCompletionContentPartTextParam(type="text", text=message.caption or "Посмотри на изображение"),
-                        ChatCompletionContentPartImageParam(type="image_url", image_url={"url": url}),
+                        ChatCompletionContentPartImageParam(
+                            type="image_url",
+                            image_url={"url": self._file_service.image_ref(photo.file_id, photo.file_unique_id)},
+                        ),
                     ],
                 )
             )
-            response = await self._client.chat.completions.create(
-                model=model,
-                messages=history,
-            )
-
-            reply = response.choices[0].message.content
+            async for delta in self._stream_completion(message.bot, history, model):
+                yield GPTMessageResponse(text=delta)
 
-            history.append(ChatCompletionAssistantMessageParam(role="assistant", content=reply))
-
-            return GPTMessageResponse(text=reply)
-
-    async def _handle_voice(self, message: Message, history, model: str):
-        file = await message.bot.get_file(message.voice.file_id)
-        url = f"https://api.telegram.org/file/bot{message.bot.token}/{file.file_path}"
-        transcript = await self._transcribe_audio(url)
+    async def _handle_voice(self, message: Message, history, model: str) -> AsyncIterator[GPTMessageResponse]:
+        transcript = await self._transcribe_audio(message.bot, message.voice)
         if image_prompt := self._parse_image_prompt(transcript):
             logger.info(f"Detected image generation prompt: {image_prompt}")
             text_message = Message(**{**message.model_dump(), "text": image_prompt})
-            return await self.process_dalle_request(text_message, history)
+            yield await self.process_dalle_request(text_message, history)
         else:
             history.append(ChatCompletionUserMessageParam(role="user", content=transcript))
-            response = await self._client.chat.completions.create(
-                model=model,
-                messages=history,
-            )
-
-            reply = response.choices[0].message.content
-
-            history.append(ChatCompletionAssistantMessageParam(role="assistant", content=reply))
-
-            return GPTMessageResponse(text=reply)
+            async for delta in self._stream_completion(message.bot, history, model):
+                yield GPTMessageResponse(text=delta)
 
-    async def _handle_text(self, message: Message, history, model: str):
+    async def _handle_text(self, message: Message, history, model: str) -> AsyncIterator[GPTMessageResponse]:
         if image_prompt := self._parse_image_prompt(message.text):
             logger.info(f"Detected image generation prompt: {image_prompt}")
             text_message = Message(**{**message.model_dump(), "text": image_prompt})
-            return await self.process_dalle_request(text_message, history)
+            yield await self.process_dalle_request(text_message, history)
         else:
-            history.append(ChatCompletionUserMessageParam(role="user", content=message.text))
-            response = await self._client.chat.completions.create(
-                model=model,
-                messages=history,
-            )
-
-            reply = response.choices[0].message.content
+            # Only prompts without prior context are deterministic enough to reuse an answer
+            cache_key = self._response_cache.key(model, message.text, history) if self._response_cache.enabled and not history else None
+            if cache_key and (reply := self._response_cache.get(cache_key)) is not None:
+                history.append(ChatCompletionUserMessageParam(role="user", content=message.text))
+                history.append(ChatCompletionAssistantMessageParam(role="assistant", content=reply))
+                self._response_cache.record_saving(tokens=count_prompt_tokens(history))
+                yield GPTMessageResponse(text=reply)
+                return
 
-            history.append(ChatCompletionAssistantMessageParam(role="assistant", content=reply))
-
-            return GPTMessageResponse(text=reply)
+            history.append(ChatCompletionUserMessageParam(role="user", content=message.text))
+            async for delta in self._stream_completion(message.bot, history, model):
+                yield GPTMessageResponse(text=delta)
+            if cache_key:
+                self._response_cache.put(cache_key, message_text(history[-1]))
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+from functools import partial
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from openai import AsyncOpenAI
+from openai.types.chat import (
+    ChatCompletionContentPartTextParam,
+    ChatCompletionMessageParam,
+    ChatCompletionSystemMessageParam,
+    ChatCompletionUserMessageParam,
+)
+
+from bot.enums import OpenAIPriorityEnum
+from bot.metrics import timed_openai
+from bot.services.rate_limiter import OpenAIRateLimiter
+from bot.utils.tokens import count_message_tokens, count_prompt_tokens
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DESCRIPTION_LIMIT = 300
+
+SUMMARY_PROMPT = (
+    "Ты ведёшь краткое содержание диалога пользователя с ассистентом. "
+    "Объедини текущее содержание с новыми репликами в один сжатый конспект: "
+    "факты о пользователе, его цели, принятые решения и открытые вопросы. "
+    "Пиши на языке диалога, не больше 200 слов."
+)
+
+
+def message_text(message: ChatCompletionMessageParam) -> str:
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    return " ".join(
+        part["text"] if part.get("type") == "text" else "[изображение]"
+        for part in content or []
+    )
+
+
+class ConversationHistory:
+    """Conversation turns kept in FSM data with cached per-message token counts.
+
+    ``messages`` is the prompt handed to the model: the rolling summary (if any) as a
+    system message followed by the stored turns. Handlers append to it in place.
+    """
+
+    def __init__(self, data: dict[str, Any]):
+        self.summary: str | None = data.get("history_summary")
+        turns: list[ChatCompletionMessageParam] = list(data.get("history", []))
+        tokens: list[int] = list(data.get("history_tokens", []))
+        # Histories written before token caching have no counts, recount them once
+        self._tokens = tokens if len(tokens) == len(turns) else [count_message_tokens(m) for m in turns]
+        self.messages: list[ChatCompletionMessageParam] = []
+        if self.summary:
+            self.messages.append(
+                ChatCompletionSystemMessageParam(role="system", content=f"Краткое содержание предыдущего диалога:\n{self.summary}")
+            )
+        self._offset = len(self.messages)
+        self.messages.extend(turns)
+
+    @property
+    def turns(self) -> list[ChatCompletionMessageParam]:
+        return self.messages[self._offset:]
+
+    def _count_new_turns(self) -> list[int]:
+        turns = self.turns
+        self._tokens += [count_message_tokens(m) for m in turns[len(self._tokens):]]
+        return self._tokens
+
+    def trim(self, budget: int) -> list[ChatCompletionMessageParam]:
+        """Drop the oldest turns until the history fits ``budget`` tokens and return them.
+
+        The latest turn is always kept, and eviction never stops on an assistant reply
+        so the remaining history starts with a user message.
+        """
+        turns = self.turns
+        tokens = self._count_new_turns()
+
+        total = sum(tokens)
+        cut = 0
+        while cut < len(turns) - 1 and (total > budget or turns[cut]["role"] == "assistant"):
+            total -= tokens[cut]
+            cut += 1
+
+        evicted = turns[:cut]
+        del self.messages[self._offset:self._offset + cut]
+        self._tokens = tokens[cut:]
+        return evicted
+
+    def strip_images(self, max_age: int) -> tuple[int, int]:
+        """Replace image parts older than ``max_age`` user turns with a text description.
+
+        The description is the beginning of the assistant reply that followed the image.
+        Returns the number of replaced parts and the prompt tokens saved per request.
+        """
+        turns = self.turns
+        tokens = self._count_new_turns()
+        replaced = saved = 0
+        age = 0
+        for i in range(len(turns) - 1, -1, -1):
+            message = turns[i]
+            if message["role"] != "user":
+                continue
+            age += 1
+            content = message.get("content")
+            if age <= max_age or isinstance(content, str) or not content:
+                continue
+            if not any(part.get("type") == "image_url" for part in content):
+                continue
+
+            description = self._image_description(turns[i + 1:i + 2])
+            parts = []
+            for part in content:
+                if part.get("type") == "image_url":
+                    replaced += 1
+                    part = ChatCompletionContentPartTextParam(type="text", text=f"[Изображение: {description}]")
+                parts.append(part)
+            stripped = ChatCompletionUserMessageParam(role="user", content=parts)
+            stripped_tokens = count_message_tokens(stripped)
+            saved += tokens[i] - stripped_tokens
+            self.messages[self._offset + i] = stripped
+            tokens[i] = stripped_tokens
+        return replaced, saved
+
+    @staticmethod
+    def _image_description(replies: list[ChatCompletionMessageParam]) -> str:
+        if not replies or replies[0]["role"] != "assistant":
+            return "описание недоступно"
+        text = message_text(replies[0]).strip()
+        return text if len(text) <= IMAGE_DESCRIPTION_LIMIT else f"{text[:IMAGE_DESCRIPTION_LIMIT]}…"
+
+    def to_state(self) -> dict[str, Any]:
+        return {"history": self.turns, "history_tokens": self._tokens}
+
+    @staticmethod
+    def empty_state() -> dict[str, Any]:
+        return {"history": [], "history_tokens": [], "history_summary": None}
+
+
+class HistorySummarizer:
+    """Folds evicted turns into the rolling ``history_summary`` in the background.
+
+    Summaries for one chat are chained so each run starts from the previous result.
+    ``reset`` clears the history and cancels the chain; ``history_epoch`` in FSM data
+    is bumped on every reset, so a summary that was already past cancellation does not
+    bring the cleared context back.
+    """
+
+    def __init__(self, client: AsyncOpenAI, rate_limiter: OpenAIRateLimiter, model: str):
+        self._client = client
+        self._rate_limiter = rate_limiter
+        self._model = model
+        self._tasks: dict[Any, asyncio.Task] = {}
+
+    def schedule(self, state: FSMContext, evicted: list[ChatCompletionMessageParam]) -> None:
+        if not evicted:
+            return
+        previous = self._tasks.get(state.key)
+        task = asyncio.create_task(self._summarize(state, evicted, previous))
+        self._tasks[state.key] = task
+        task.add_done_callback(partial(self._forget, state.key))
+
+    async def reset(self, state: FSMContext, **data: Any) -> None:
+        """Clear the chat's history, its summary and any summary still being made."""
+        task = self._tasks.pop(state.key, None)
+        if task is not None:
+            task.cancel()
+        epoch = (await state.get_data()).get("history_epoch", 0)
+        await state.update_data(**ConversationHistory.empty_state(), history_epoch=epoch + 1, **data)
+
+    async def close(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def _forget(self, key: Any, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def _summarize(
+        self,
+        state: FSMContext,
+        evicted: list[ChatCompletionMessageParam],
+        previous: asyncio.Task | None,
+    ) -> None:
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        data = await state.get_data()
+        summary, epoch = data.get("history_summary"), data.get("history_epoch", 0)
+        transcript = "\n".join(f"{m['role']}: {message_text(m)}" for m in evicted)
+        messages = [
+            ChatCompletionSystemMessageParam(role="system", content=SUMMARY_PROMPT),
+            ChatCompletionUserMessageParam(
+                role="user",
+                content=f"Текущее содержание:\n{summary or '—'}\n\nНовые реплики:\n{transcript}",
+            ),
+        ]
+        try:
+            response = await self._rate_limiter.call(
+                self._model,
+                tokens=count_prompt_tokens(messages),
+                priority=OpenAIPriorityEnum.low,
+                request=timed_openai(self._model, "chat.completions", lambda: self._client.chat.completions.with_raw_response.create(
+                    model=self._model,
+                    messages=messages,
+                )),
+            )
+        except Exception:
+            logger.exception("Failed to summarize evicted history")
+            return
+
+        if (await state.get_data()).get("history_epoch", 0) != epoch:
+            # The history was reset while the summary was being made
+            return
+        await state.update_data(history_summary=response.choices[0].message.content)
+
+
+class ImageRetentionPolicy:
+    """Strips images from history once they are older than the per-model turn limit.
+
+    Images are re-sent as vision input on every request while they stay in history;
+    after ``max_turns`` later user turns only the model's own description is kept.
+    ``saved_tokens`` adds up, once per stripped image, the prompt tokens each later
+    request no longer sends; it is a running total, not a per-request figure.
+    """
+
+    stats_counters = ("replaced_images", "saved_tokens")
+
+    def __init__(self, max_turns: dict[str, int], default_max_turns: int):
+        self._max_turns = max_turns
+        self._default_max_turns = default_max_turns
+        self._replaced = 0
+        self._saved_tokens = 0
+
+    def apply(self, history: ConversationHistory, model: str) -> None:
+        replaced, saved = history.strip_images(self._max_turns.get(model, self._default_max_turns))
+        self._replaced += replaced
+        self._saved_tokens += saved
+
+    def stats(self) -> dict[str, int]:
+        return {"replaced_images": self._replaced, "saved_tokens": self._saved_tokens}
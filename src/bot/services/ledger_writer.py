@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from bot.entities.ledger import LedgerEntity
+from bot.interfaces.uow import AbcUnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerWriter:
+    """Write-behind sink for ledger entries.
+
+    Balance changes are committed synchronously by the caller; the matching audit
+    entries are queued here and inserted in one multi-row statement every
+    ``flush_interval`` seconds or as soon as ``flush_batch_size`` entries are pending.
+    ``close()`` drains whatever is still queued.
+    """
+
+    stats_counters = ("written", "batches", "failures")
+
+    def __init__(self, uow_factory: Callable[[], AbcUnitOfWork], flush_interval: float, flush_batch_size: int):
+        self._uow_factory = uow_factory
+        self._flush_interval = flush_interval
+        self._flush_batch_size = flush_batch_size
+        self._pending: list[LedgerEntity] = []
+        self._flush_requested = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self._flush_time = 0.0
+
+    def enqueue(self, entry: LedgerEntity) -> None:
+        self._pending.append(entry)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if len(self._pending) >= self._flush_batch_size:
+            self._flush_requested.set()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:self._flush_batch_size]
+                del self._pending[:len(batch)]
+                started_at = time.monotonic()
+                try:
+                    async with self._uow_factory() as uow:
+                        await uow.ledger.add_many(batch)
+                except BaseException:
+                    # Entries are only dropped once they are committed
+                    self._pending[:0] = batch
+                    self.failures += 1
+                    raise
+                self._flush_time += time.monotonic() - started_at
+                self.written += len(batch)
+                self.batches += 1
+
+    async def close(self) -> None:
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._pending:
+            logger.info(f"Draining {len(self._pending)} ledger entries")
+        await self.flush()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failures": self.failures,
+            "avg_batch_size": self.written / self.batches if self.batches else 0.0,
+            "avg_flush_time": self._flush_time / self.batches if self.batches else 0.0,
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush ledger entries")
@@ -1,11 +1,74 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Iterable
+
 from bot.enums import BotModeEnum
 from bot.interfaces.services.pricing import AbcPricingService
 from bot.interfaces.uow import AbcUnitOfWork
+from bot.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSnapshot:
+    """Process-wide in-memory copy of the ``prices`` table.
+
+    Loaded once on startup and refreshed in the background every ``refresh_interval``
+    seconds. ``invalidate`` forces a reload on the next lookup.
+    """
+
+    def __init__(self, uow_factory: Callable[[], AbcUnitOfWork], refresh_interval: float):
+        self._uow_factory = uow_factory
+        self._refresh_interval = refresh_interval
+        self._prices: dict[str, int] | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def _is_stale(self) -> bool:
+        return self._prices is None or time.monotonic() - self._loaded_at > self._refresh_interval
+
+    async def get(self) -> dict[str, int]:
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self.load()
+        return self._prices
+
+    async def load(self) -> None:
+        async with self._uow_factory() as uow:
+            prices = await uow.price.list_all()
+        self._prices = {p.key: p.price for p in prices}
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Price snapshot loaded: {self._prices}")
+
+    def invalidate(self) -> None:
+        self._prices = None
+
+    async def start(self) -> None:
+        await self.load()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            # A refresh cut short may still be using its session, let it unwind before the engine goes
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Failed to refresh price snapshot")
 
 
 class PricingService(AbcPricingService):
-    def __init__(self, uow: AbcUnitOfWork):
-        self._uow = uow
+    def __init__(self, snapshot: PriceSnapshot):
+        self._snapshot = snapshot
 
     @staticmethod
     def _mode_to_key(mode: BotModeEnum) -> str:
@@ -18,11 +81,18 @@ class PricingService(AbcPricingService):
         return mapping.get(mode, "unknown")
 
     async def get_price_for_mode(self, mode: BotModeEnum) -> int:
-        key = self._mode_to_key(mode)
-        async with self._uow:
-            price = await self._uow.price.get_by_key(key)
-        return price.price if price else 0
+        with span("pricing"):
+            prices = await self._snapshot.get()
+        return prices.get(self._mode_to_key(mode), 0)
+
+    async def get_prices(self, modes: Iterable[BotModeEnum]) -> dict[BotModeEnum, int]:
+        with span("pricing"):
+            prices = await self._snapshot.get()
+        return {mode: prices.get(self._mode_to_key(mode), 0) for mode in modes}
+
+    def invalidate(self) -> None:
+        self._snapshot.invalidate()
 
     async def ensure_user_can_afford(self, user_balance: int, mode: BotModeEnum) -> bool:
         price = await self.get_price_for_mode(mode)
-        return user_balance >= price
\ No newline at end of file
+        return user_balance >= price
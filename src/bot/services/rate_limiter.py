@@ -0,0 +1,189 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Mapping, TypeVar
+
+from openai import RateLimitError
+from openai._legacy_response import LegacyAPIResponse
+
+from bot.enums import OpenAIPriorityEnum
+from bot.errors import OpenAIRateLimitedError
+from bot.settings import ModelRateLimit
+from bot.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: str | None) -> float:
+    """Parse OpenAI reset durations such as ``"6m0s"`` or ``"20ms"`` into seconds."""
+    if not value:
+        return 0.0
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_RE.findall(value))
+
+
+class TokenBucket:
+    __slots__ = ("capacity", "level", "updated_at")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.level = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+
+    def wait_time(self, amount: int, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing * 60 / self.capacity if missing > 0 else 0.0
+
+    def consume(self, amount: int) -> None:
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+
+class _ModelLane:
+    def __init__(self, limit: ModelRateLimit):
+        self.requests = TokenBucket(limit.RPM)
+        self.tokens = TokenBucket(limit.TPM)
+        self.waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self.blocked_until = 0.0
+        self.timer: asyncio.TimerHandle | None = None
+        self.granted = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+
+
+class OpenAIRateLimiter:
+    """Admission control in front of the OpenAI client.
+
+    Every lane has request and token buckets refilled per minute, and callers wait in
+    the lane's priority queue, so paid requests are admitted before free and background
+    traffic. A model is its own lane unless its limit is ``SHARED_WITH`` another model,
+    then both queue together and priorities order them against each other. Limits are
+    re-synced from ``x-ratelimit-*`` response headers.
+
+    A 429 pauses the lane and the request queues again, up to ``max_retries`` times,
+    so retries wait for the reset instead of hammering OpenAI from the client.
+    """
+
+    stats_counters = ("granted", "rate_limited")
+
+    def __init__(self, limits: Mapping[str, ModelRateLimit], max_retries: int = 2):
+        self._max_retries = max_retries
+        # Stats are reported per lane, under the name of the model that owns it
+        self._owned = {model: _ModelLane(limit) for model, limit in limits.items() if not limit.SHARED_WITH}
+        self._lanes = dict(self._owned)
+        for model, limit in limits.items():
+            if limit.SHARED_WITH:
+                if limit.SHARED_WITH not in self._owned:
+                    raise ValueError(f"{model} is shared with {limit.SHARED_WITH}, which has no lane of its own")
+                self._lanes[model] = self._owned[limit.SHARED_WITH]
+        self._seq = itertools.count()
+
+    async def call(
+        self,
+        model: str,
+        tokens: int,
+        priority: OpenAIPriorityEnum,
+        request: Callable[[], Awaitable[LegacyAPIResponse[R]]],
+    ) -> R:
+        for attempt in itertools.count():
+            with span("openai.rate_limit", model=model, attempt=attempt):
+                await self.acquire(model, tokens, priority)
+            try:
+                response = await request()
+            except RateLimitError as e:
+                self.observe(model, e.response.headers, rate_limited=True)
+                if attempt >= self._max_retries:
+                    raise OpenAIRateLimitedError from e
+                continue
+            self.observe(model, response.headers)
+            return response.parse()
+
+    async def acquire(self, model: str, tokens: int, priority: OpenAIPriorityEnum = OpenAIPriorityEnum.normal) -> None:
+        lane = self._lanes.get(model)
+        if lane is None:
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.waiters, (priority, next(self._seq), tokens, future))
+        if lane.timer is None:
+            self._pump(lane)
+
+        enqueued_at = time.monotonic()
+        await future
+        lane.total_wait += time.monotonic() - enqueued_at
+
+    def observe(self, model: str, headers: Mapping[str, str], rate_limited: bool = False) -> None:
+        lane = self._lanes.get(model)
+        if lane is None:
+            return
+
+        for bucket, kind in ((lane.requests, "requests"), (lane.tokens, "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if limit:
+                bucket.capacity = int(limit)
+            if remaining:
+                bucket.refill(time.monotonic())
+                bucket.level = min(bucket.level, float(remaining))
+
+        if rate_limited:
+            lane.rate_limited += 1
+            retry_after = (
+                float(headers.get("retry-after-ms") or 0) / 1000
+                or float(headers.get("retry-after") or 0)
+                or max(
+                    parse_reset(headers.get("x-ratelimit-reset-requests")),
+                    parse_reset(headers.get("x-ratelimit-reset-tokens")),
+                )
+            )
+            lane.blocked_until = max(lane.blocked_until, time.monotonic() + retry_after)
+            logger.warning(f"OpenAI rate limit hit for {model}, pausing lane for {retry_after:.2f}s")
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {
+            model: {
+                "waiting": sum(1 for *_, f in lane.waiters if not f.done()),
+                "granted": lane.granted,
+                "rate_limited": lane.rate_limited,
+                "avg_wait": lane.total_wait / lane.granted if lane.granted else 0.0,
+            }
+            for model, lane in self._owned.items()
+        }
+
+    def _pump(self, lane: _ModelLane) -> None:
+        lane.timer = None
+        now = time.monotonic()
+        while lane.waiters:
+            _, _, tokens, future = lane.waiters[0]
+            if future.done():
+                heapq.heappop(lane.waiters)
+                continue
+
+            delay = max(
+                lane.blocked_until - now,
+                lane.requests.wait_time(1, now),
+                lane.tokens.wait_time(tokens, now),
+            )
+            if delay > 0:
+                lane.timer = asyncio.get_running_loop().call_later(delay, self._pump, lane)
+                return
+
+            heapq.heappop(lane.waiters)
+            lane.requests.consume(1)
+            lane.tokens.consume(tokens)
+            lane.granted += 1
+            future.set_result(None)
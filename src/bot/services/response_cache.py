@@ -0,0 +1,75 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+import orjson
+from openai.types.chat import ChatCompletionMessageParam
+
+
+def normalize_prompt(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def history_fingerprint(history: list[ChatCompletionMessageParam]) -> str:
+    return hashlib.sha256(orjson.dumps(history, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class ResponseCache:
+    """Exact-match cache of model answers to one-shot prompts.
+
+    Entries are keyed by model, normalized prompt and a fingerprint of the history the
+    prompt was sent with, and live in an LRU bounded by ``max_entries`` that expires
+    them after ``ttl`` seconds. Chat entries hold the reply text; DALL·E entries hold
+    the Telegram ``file_id`` of the photo already sent, so a repeat costs no upload
+    and no OpenAI call. Callers only use it for stateless requests.
+    """
+
+    stats_counters = ("hits", "misses", "saved_tokens", "saved_images")
+
+    def __init__(self, enabled: bool, max_entries: int, ttl: int):
+        self.enabled = enabled
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._saved_tokens = 0
+        self._saved_images = 0
+
+    @staticmethod
+    def key(model: str, prompt: str, history: list[ChatCompletionMessageParam]) -> str:
+        raw = f"{model}\0{history_fingerprint(history)}\0{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] > self._ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value: str) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def record_saving(self, tokens: int = 0, images: int = 0) -> None:
+        self._saved_tokens += tokens
+        self._saved_images += images
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "saved_tokens": self._saved_tokens,
+            "saved_images": self._saved_images,
+        }
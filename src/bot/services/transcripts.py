@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, UTC
+from typing import Callable
+
+from bot.interfaces.uow import AbcUnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptCache:
+    """Two-tier cache of voice transcripts.
+
+    The in-memory tier is an LRU bounded by ``max_entries``; the optional persistent
+    tier is the ``voice_transcripts`` table. Both tiers expire entries after ``ttl``
+    seconds. A transcript is stored under several keys (``file_unique_id`` and the
+    audio hash), so a lookup by any of them hits and fills in the others locally.
+    """
+
+    stats_counters = ("hits", "misses")
+
+    def __init__(self, uow_factory: Callable[[], AbcUnitOfWork], max_entries: int, ttl: int, persistent: bool):
+        self._uow_factory = uow_factory
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._persistent = persistent
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_key(file_unique_id: str) -> str:
+        return f"file:{file_unique_id}"
+
+    @staticmethod
+    def audio_key(digest: str) -> str:
+        return f"sha256:{digest}"
+
+    async def get(self, *keys: str, count_miss: bool = True) -> str | None:
+        """Look ``keys`` up in memory, then in the table. ``count_miss=False`` is for a
+        probe that is followed by another lookup, so a message counts one miss at most."""
+        now = time.monotonic()
+        for key in keys:
+            if (text := self._lookup(key, now)) is not None:
+                self._remember([k for k in keys if k not in self._entries], text)
+                self.hits += 1
+                return text
+
+        if self._persistent:
+            newer_than = datetime.now(UTC).replace(tzinfo=None) - timedelta(seconds=self._ttl)
+            async with self._uow_factory() as uow:
+                transcript = await uow.transcript.get_any(list(keys), newer_than)
+            if transcript:
+                self._remember(keys, transcript.text)
+                self.hits += 1
+                return transcript.text
+
+        if count_miss:
+            self.misses += 1
+        return None
+
+    async def put(self, keys: list[str], text: str) -> None:
+        self._remember(keys, text)
+        if self._persistent:
+            try:
+                async with self._uow_factory() as uow:
+                    await uow.transcript.upsert(keys, text)
+            except Exception:
+                logger.exception("Failed to persist voice transcript")
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _lookup(self, key: str, now: float) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        text, stored_at = entry
+        if now - stored_at > self._ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def _remember(self, keys: list[str] | tuple[str, ...], text: str) -> None:
+        now = time.monotonic()
+        for key in keys:
+            self._entries[key] = (text, now)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
@@ -6,25 +6,30 @@ from bot.interfaces.services.user import AbcUserService
 from bot.interfaces.uow import AbcUnitOfWork
 from aiogram.types import User as TelegramUser
 from bot.entities.ledger import LedgerEntity
+from bot.services.ledger_writer import LedgerWriter
 
 logger = logging.getLogger(__name__)
 
 class UserService(AbcUserService):
-    def __init__(self, uow: AbcUnitOfWork):
+    def __init__(self, uow: AbcUnitOfWork, ledger_writer: LedgerWriter):
         self._uow = uow
+        self._ledger_writer = ledger_writer
 
     async def is_user_new(self, telegram_user: TelegramUser) -> Tuple[UserEntity, bool]:
         user_data = UserDTO(telegram_id=telegram_user.id, username=telegram_user.username)
         async with self._uow:
             user, is_new = await self._uow.user.get_or_create(user_data)
+            if is_new:
+                # Give welcome bonus in the same transaction as the registration
+                bonus = 200
+                updated = await self._uow.user.update_balance_by_user_id(user.id, bonus)
+                user = updated if updated else user
+                # The bonus ledger entry must not outlive a rolled back registration
+                await self._uow.commit()
 
         if is_new:
             logger.info(f"New user registered: {user.telegram_id}")
-            # Give welcome bonus and record ledger
-            bonus = 200
-            updated = await self._uow.user.update_balance_by_user_id(user.id, bonus)
-            await self._uow.ledger.add(LedgerEntity(user_id=user.id, delta=bonus, reason="welcome bonus", meta=None))
-            user = updated if updated else user
+            self._ledger_writer.enqueue(LedgerEntity(user_id=user.id, delta=bonus, reason="welcome bonus", meta=None))
 
         return user, is_new
 
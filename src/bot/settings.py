@@ -1,6 +1,8 @@
-from pydantic import PostgresDsn
+from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from bot.enums import UserCacheModeEnum
+
 
 class PostgresSettings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -11,6 +13,24 @@ class PostgresSettings(BaseSettings):
 
     URI: PostgresDsn
     MIGRATION_TIMEOUT: int = 30
+    POOL_SIZE: int = 10
+    MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30.0
+    POOL_RECYCLE: int = 1800
+    POOL_PRE_PING: bool = True
+    CONNECT_TIMEOUT: float = 10.0
+    COMMAND_TIMEOUT: float | None = 60.0
+    # Prepared statements cached per connection, set to 0 behind PgBouncer in transaction mode
+    STATEMENT_CACHE_SIZE: int = 100
+    # Compiled SQL kept by SQLAlchemy for the whole engine
+    QUERY_CACHE_SIZE: int = 500
+
+
+class ModelRateLimit(BaseModel):
+    RPM: int = 0
+    TPM: int = 0
+    # Model whose buckets and admission queue this one uses; its own RPM/TPM are ignored
+    SHARED_WITH: str | None = None
 
 
 class OpenAISettings(BaseSettings):
@@ -20,6 +40,194 @@ class OpenAISettings(BaseSettings):
         extra="ignore",
     )
     API_KEY: str
+    # Rate limited requests are retried by OpenAIRateLimiter once the lane's pause is over;
+    # the client's own retries are disabled so they do not pile onto each other
+    MAX_RETRIES: int = 2
+    # Per-model requests/tokens per minute, 0 means unlimited
+    RATE_LIMITS: dict[str, ModelRateLimit] = {
+        "gpt-5": ModelRateLimit(RPM=500, TPM=500_000),
+        # One queue for both, so paid GPT-5 requests are admitted ahead of free mini ones
+        "gpt-5-mini": ModelRateLimit(SHARED_WITH="gpt-5"),
+        "dall-e-3": ModelRateLimit(RPM=5),
+        "whisper-1": ModelRateLimit(RPM=50),
+    }
+
+
+class PricingSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="PRICING__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    REFRESH_INTERVAL: float = 300.0
+
+
+class FsmSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="FSM__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    CACHE_SIZE: int = 10_000
+    # Cached states are reloaded after this long even without a notification
+    CACHE_TTL: float = 300.0
+    # Drop states other replicas wrote, from fsm_states notifications; needed with several replicas
+    NOTIFY: bool = True
+    FLUSH_INTERVAL: float = 0.5
+    FLUSH_BATCH_SIZE: int = 500
+
+
+class LedgerSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="LEDGER__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    FLUSH_INTERVAL: float = 1.0
+    FLUSH_BATCH_SIZE: int = 1000
+    PARTITIONS_AHEAD: int = 2
+    RETENTION_MONTHS: int = 12
+
+
+class BonusSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="BONUS__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    DAILY_AMOUNT: int = 200
+    CHUNK_SIZE: int = 5000
+
+
+class UserCacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="USER_CACHE__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    MODE: UserCacheModeEnum = UserCacheModeEnum.notify
+    MAX_ENTRIES: int = 20_000
+    TTL: float = 300.0
+
+
+class WebhookSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="WEBHOOK__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    BASE_URL: str | None = None
+    HOST: str = "0.0.0.0"
+    PORT: int = 8080
+    PATH: str = "/webhook"
+    SECRET_TOKEN: str | None = None
+    MAX_IN_FLIGHT: int = 100
+    MAX_CONNECTIONS: int = 40
+
+
+class MetricsSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="METRICS__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    ENABLED: bool = True
+    HOST: str = "0.0.0.0"
+    PORT: int = 9464
+
+
+class TracingSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="TRACING__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    ENABLED: bool = True
+    # Updates slower than this many seconds are logged with a per-span breakdown
+    SLOW_UPDATE_THRESHOLD: float = 10.0
+    # Every trace is appended here as OTLP/JSON when set
+    EXPORT_PATH: str | None = None
+
+
+class SchedulerSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="SCHEDULER__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    MAX_CONCURRENT_UPDATES: int = 64
+
+
+class HistorySettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="HISTORY__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    TOKEN_BUDGETS: dict[str, int] = {"gpt-5": 6000, "gpt-5-mini": 3000}
+    DEFAULT_TOKEN_BUDGET: int = 3000
+    SUMMARY_MODEL: str = "gpt-5-mini"
+    # User turns an image stays in history before it is replaced by its description
+    IMAGE_RETENTION_TURNS: dict[str, int] = {"gpt-5": 2, "gpt-5-mini": 1}
+    DEFAULT_IMAGE_RETENTION_TURNS: int = 1
+
+
+class FilesSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="FILES__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    CACHE_DIR: str = "/tmp/vento/files"
+    MAX_CACHE_BYTES: int = 512 * 1024 * 1024
+    MAX_CONNECTIONS: int = 20
+
+
+class TranscriptSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="TRANSCRIPTS__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    CACHE_SIZE: int = 2000
+    PERSISTENT: bool = True
+    TTL: int = 7 * 24 * 3600
+
+
+class ResponseCacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="RESPONSE_CACHE__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    ENABLED: bool = False
+    MAX_ENTRIES: int = 5000
+    TTL: int = 24 * 3600
+
+
+class StreamSettings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="STREAM__",
+        env_file=".env",
+        extra="ignore",
+    )
+
+    EDIT_INTERVAL: float = 1.0
+    EDIT_MIN_CHARS: int = 40
+    MESSAGE_LIMIT: int = 4096
 
 
 class Settings(BaseSettings):
@@ -29,6 +237,20 @@ class Settings(BaseSettings):
     MAIN_TOKEN: str
     POSTGRES: PostgresSettings = PostgresSettings()
     OPENAI: OpenAISettings = OpenAISettings()
+    STREAM: StreamSettings = StreamSettings()
+    PRICING: PricingSettings = PricingSettings()
+    FSM: FsmSettings = FsmSettings()
+    LEDGER: LedgerSettings = LedgerSettings()
+    BONUS: BonusSettings = BonusSettings()
+    USER_CACHE: UserCacheSettings = UserCacheSettings()
+    WEBHOOK: WebhookSettings = WebhookSettings()
+    METRICS: MetricsSettings = MetricsSettings()
+    TRACING: TracingSettings = TracingSettings()
+    SCHEDULER: SchedulerSettings = SchedulerSettings()
+    HISTORY: HistorySettings = HistorySettings()
+    FILES: FilesSettings = FilesSettings()
+    TRANSCRIPTS: TranscriptSettings = TranscriptSettings()
+    RESPONSE_CACHE: ResponseCacheSettings = ResponseCacheSettings()
 
 
 settings = Settings()
@@ -0,0 +1,62 @@
+import re
+from typing import NamedTuple
+
+IMAGE_PROMPT_PATTERNS = [
+    r"(?:^|\s)!draw\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)сгенерируй\s*(?:картинку|изображение)?\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)создай\s*(?:картинку|изображение)?\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)нарисуй\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)хочу\s*(?:увидеть|получить)?\s*(?:картинку|изображение)?\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)покажи\s*(?:мне)?\s*(?:рисунок|арт|картинку)\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)изобрази\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)(?:придумай|представь)\s*(?:и)?\s*(?:сделай|покажи)?\s*(?:картинку|сцену|изображение)\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)generate\s*(?:an? )?(?:image|picture|art)\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)draw\s*(?:me)?\s*[:\-]?\s*(.+)",
+    r"(?:^|\s)make\s*(?:a|an)?\s*(?:image|picture|drawing)\s*[:\-]?\s*(.+)",
+]
+
+# Every pattern above requires one of these words; keep them in sync when adding phrases
+IMAGE_TRIGGER_WORDS = [
+    "draw", "сгенерируй", "создай", "нарисуй", "хочу", "покажи", "изобрази", "придумай", "представь",
+    "generate", "make",
+]
+
+IMAGE_EXCLUDE_KEYWORDS = [
+    "словами", "опиши", "текстом", "расскажи", "в виде текста"
+]
+
+
+class ImageIntent(NamedTuple):
+    pattern: int
+    prompt: str
+
+
+class ImageIntentDetector:
+    """Detects "draw me X" requests in user text and extracts the image prompt.
+
+    Messages without any trigger word are rejected by cheap substring checks. The rest are
+    searched with the precompiled patterns in list order: the first pattern that matches
+    anywhere in the text wins.
+    """
+
+    def __init__(
+        self,
+        patterns: list[str] = IMAGE_PROMPT_PATTERNS,
+        triggers: list[str] = IMAGE_TRIGGER_WORDS,
+        exclude: list[str] = IMAGE_EXCLUDE_KEYWORDS,
+    ):
+        self._triggers = tuple(t.lower() for t in triggers)
+        self._exclude = tuple(e.lower() for e in exclude)
+        self._patterns = tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+
+    def detect(self, text: str) -> ImageIntent | None:
+        lowered = text.lower()
+        if not any(t in lowered for t in self._triggers) or any(e in lowered for e in self._exclude):
+            return None
+        for i, pattern in enumerate(self._patterns):
+            if match := pattern.search(text):
+                return ImageIntent(pattern=i, prompt=match.group(1))
+        return None
+
+
+image_intent_detector = ImageIntentDetector()
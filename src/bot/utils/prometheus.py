@@ -0,0 +1,241 @@
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from dataclasses import asdict, is_dataclass
+from typing import Any, Callable, Iterable, Protocol
+
+# Seconds; OpenAI streams and whole updates routinely take tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Collector(Protocol):
+    name: str
+
+    def render(self, lines: list[str]) -> None: ...
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        if not labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> Any: ...
+
+    def render(self, lines: list[str]) -> None:
+        lines.append(f"# HELP {self.name} {_escape(self.documentation)}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in self._children.items():
+            self._render_child(lines, values, child)
+
+    def _render_child(self, lines: list[str], values: tuple[str, ...], child: Any) -> None:
+        lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, lines: list[str], values: tuple[str, ...], child: _HistogramChild) -> None:
+        names = (*self.labelnames, "le")
+        cumulative = 0
+        for bound, count in zip((*self.bounds, math.inf), child.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(names, (*values, _format_value(bound)))} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+
+
+class StatsCollector:
+    """Exposes the numeric fields of a component's ``stats()`` as gauges.
+
+    ``stats`` may return a dict or a dataclass. With ``label`` set it is expected to
+    return one such mapping per label value, like the per-model rate limiter stats.
+    Fields named in ``counters`` only ever grow and are exposed as counters with the
+    ``_total`` suffix. Fields are read when ``/metrics`` is scraped, so the component
+    keeps its own counters and pays nothing extra per event.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        stats: Callable[[], Any],
+        label: str | None = None,
+        counters: Iterable[str] = (),
+    ):
+        self.name = name
+        self._stats = stats
+        self._label = label
+        self._counters = frozenset(counters)
+
+    def render(self, lines: list[str]) -> None:
+        stats = self._stats()
+        rows = stats.items() if self._label else [(None, stats)]
+        fields: dict[str, list[str]] = {}
+        for label_value, values in rows:
+            if is_dataclass(values):
+                values = asdict(values)
+            labels = _format_labels((self._label,), (label_value,)) if self._label else ""
+            for field, value in values.items():
+                if isinstance(value, (int, float)):
+                    name = f"{self.name}_{field}_total" if field in self._counters else f"{self.name}_{field}"
+                    fields.setdefault(field, []).append(f"{name}{labels} {_format_value(float(value))}")
+        for field, samples in fields.items():
+            if field in self._counters:
+                lines.append(f"# TYPE {self.name}_{field}_total counter")
+            else:
+                lines.append(f"# TYPE {self.name}_{field} gauge")
+            lines.extend(samples)
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text exposition format.
+
+    Metrics are only ever touched from the event loop thread, including SQLAlchemy
+    events which run in the loop's greenlets, so children are plain slotted objects
+    updated without locks; a sample costs a dict lookup and an addition.
+    """
+
+    def __init__(self) -> None:
+        self._collectors: dict[str, Collector] = {}
+
+    def register(self, collector: Collector) -> None:
+        self._collectors[collector.name] = collector
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for collector in self._collectors.values():
+            collector.render(lines)
+        lines.append("")
+        return "\n".join(lines)
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from bot.settings import StreamSettings
+
+logger = logging.getLogger(__name__)
+
+
+class MessageStreamWriter:
+    """Progressively renders streamed text into Telegram messages.
+
+    Edits are coalesced: the first chunk is shown immediately, after that the
+    message is edited at most once per ``EDIT_INTERVAL`` seconds and only when at
+    least ``EDIT_MIN_CHARS`` new characters arrived. Text past ``MESSAGE_LIMIT``
+    rolls over into a new message.
+    """
+
+    def __init__(self, message: Message, settings: StreamSettings):
+        self._message: Message | None = message
+        self._chat_message = message
+        self._settings = settings
+        self._text = ""
+        self._sent_text = ""
+        # Progress edits are plain text, the final render must still happen for the same text
+        self._sent_final = False
+        self._next_edit_at = 0.0
+
+    async def feed(self, delta: str) -> None:
+        self._text += delta
+
+        while len(self._text) > self._settings.MESSAGE_LIMIT:
+            head, self._text = self._split(self._text, self._settings.MESSAGE_LIMIT)
+            await self._render(head, final=True)
+            self._message = None
+            self._sent_text = ""
+            self._sent_final = False
+
+        if self._should_edit():
+            await self._render(self._text, final=False)
+
+    async def finish(self) -> None:
+        if self._text:
+            await self._render(self._text, final=True)
+
+    def _should_edit(self) -> bool:
+        if not self._text.strip():
+            return False
+        if not self._sent_text:
+            return True
+        if time.monotonic() < self._next_edit_at:
+            return False
+        return len(self._text) - len(self._sent_text) >= self._settings.EDIT_MIN_CHARS
+
+    async def _render(self, text: str, final: bool) -> None:
+        if text == self._sent_text and (self._sent_final or not final):
+            return
+
+        parse_mode = "Markdown" if final else None
+        try:
+            await self._send(text, parse_mode)
+        except TelegramRetryAfter as e:
+            if not final:
+                self._next_edit_at = time.monotonic() + e.retry_after
+                return
+            await asyncio.sleep(e.retry_after)
+            await self._send(text, parse_mode)
+        except TelegramBadRequest as e:
+            if "message is not modified" in e.message:
+                # Markdown without any markup renders exactly like the plain text shown
+                pass
+            elif parse_mode is None:
+                logger.warning(f"Failed to render streamed message: {e.message}")
+                return
+            elif text != self._sent_text:
+                # Unbalanced markdown in model output, fall back to plain text unless already shown
+                await self._send(text, None)
+
+        self._sent_text = text
+        self._sent_final = final
+        self._next_edit_at = time.monotonic() + self._settings.EDIT_INTERVAL
+
+    async def _send(self, text: str, parse_mode: str | None) -> None:
+        if self._message is None:
+            self._message = await self._chat_message.answer(text, parse_mode=parse_mode)
+        else:
+            await self._message.edit_text(text, parse_mode=parse_mode)
+
+    @staticmethod
+    def _split(text: str, limit: int) -> tuple[str, str]:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        return text[:cut], text[cut:].lstrip()
@@ -0,0 +1,24 @@
+from typing import Any, Iterable, Mapping
+
+# Vision input for a single image at "auto" detail is billed at up to ~765 tokens
+IMAGE_PART_TOKENS = 765
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_message_tokens(message: Mapping[str, Any]) -> int:
+    """Approximate token count of a chat message: ~4 characters per token plus overhead."""
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += len(content) // 4
+    elif content:
+        for part in content:
+            if part.get("type") == "text":
+                tokens += len(part["text"]) // 4
+            elif part.get("type") == "image_url":
+                tokens += IMAGE_PART_TOKENS
+    return tokens
+
+
+def count_prompt_tokens(messages: Iterable[Mapping[str, Any]]) -> int:
+    return sum(count_message_tokens(m) for m in messages)
@@ -0,0 +1,186 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+import orjson
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    """Spans recorded while handling one update.
+
+    Spans are kept in a flat list in the order they finish. Once the trace is closed,
+    background tasks that inherited its context stop adding to it.
+    """
+
+    __slots__ = ("trace_id", "spans", "closed")
+
+    def __init__(self) -> None:
+        self.trace_id = _new_id(128)
+        self.spans: list[Span] = []
+        self.closed = False
+
+    @property
+    def root(self) -> "Span":
+        return self.spans[-1]
+
+    def breakdown(self) -> list[tuple[str, float, int]]:
+        """Total seconds and count per span name below the root, largest first.
+
+        Times are inclusive, so a ``pricing`` span also counts the ``db`` statements
+        it ran and phases that overlap add up to more than the update took.
+        """
+        phases: dict[str, list[float]] = {}
+        for span in self.spans:
+            if span.parent_id is None:
+                continue
+            phase = phases.setdefault(span.name, [0.0, 0])
+            phase[0] += span.duration
+            phase[1] += 1
+        return sorted(((name, total, count) for name, (total, count) in phases.items()), key=lambda p: -p[1])
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, trace: Trace, name: str, parent_id: str | None, attributes: dict[str, Any], start_ns: int | None = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns() if start_ns is None else start_ns
+        self.end_ns = 0
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def finish(self, end_ns: int | None = None) -> None:
+        self.end_ns = time.time_ns() if end_ns is None else end_ns
+        if not self.trace.closed:
+            self.trace.spans.append(self)
+
+
+def current_span() -> Span | None:
+    span = _current_span.get()
+    return span if span is not None and not span.trace.closed else None
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Open the root span of a new trace for the current context."""
+    trace = Trace()
+    root = Span(trace, name, None, attributes)
+    token = _current_span.set(root)
+    try:
+        yield trace
+    except BaseException as e:
+        root.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        root.finish()
+        trace.closed = True
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Time the block as a child of the current span; a no-op outside of a trace.
+
+    Must not be held across ``yield`` in an async generator, use ``record`` there.
+    """
+    parent = current_span()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def record(name: str, start_ns: int, end_ns: int | None = None, **attributes: Any) -> None:
+    """Add an already timed child span to the current span without entering it."""
+    parent = current_span()
+    if parent is not None:
+        Span(parent.trace, name, parent.span_id, attributes, start_ns).finish(end_ns)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpFileExporter:
+    """Appends finished traces to a file in the OTLP/JSON encoding.
+
+    Every line is one ``ExportTraceServiceRequest``, the layout the OpenTelemetry
+    Collector's file exporter writes and its ``otlpjsonfile`` receiver reads back, so
+    traces can be loaded into Jaeger or Tempo later without running a collector.
+    Lines go through a buffered file object; the loop only blocks when the buffer
+    is flushed to the page cache.
+    """
+
+    SPAN_KIND_INTERNAL = 1
+    SPAN_KIND_SERVER = 2
+    STATUS_CODE_ERROR = 2
+
+    def __init__(self, path: str | Path, service_name: str = "vento-bot"):
+        self._path = Path(path)
+        self._resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self._file: BinaryIO | None = None
+        self.exported = 0
+
+    def export(self, trace: Trace) -> None:
+        if self._file is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._path, "ab")
+        request = {
+            "resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{"scope": {"name": "bot"}, "spans": [self._encode(s) for s in trace.spans]}],
+            }],
+        }
+        self._file.write(orjson.dumps(request) + b"\n")
+        self.exported += 1
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _encode(self, span: Span) -> dict[str, Any]:
+        encoded = {
+            "traceId": span.trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self.SPAN_KIND_SERVER if span.parent_id is None else self.SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items() if v is not None],
+        }
+        if span.parent_id is not None:
+            encoded["parentSpanId"] = span.parent_id
+        if error := span.attributes.get("error"):
+            encoded["status"] = {"code": self.STATUS_CODE_ERROR, "message": error}
+        return encoded
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Webhook handler that acknowledges Telegram immediately and runs handlers in background.
+
+    At most ``max_in_flight`` updates are processed at once; further requests wait for
+    a free slot before being acknowledged, which pushes back on Telegram instead of
+    piling up unbounded tasks.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_in_flight: int, secret_token: str | None = None, **data: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, secret_token=secret_token, **data)
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        await self._slots.acquire()
+        try:
+            return await super()._handle_request_background(bot=bot, request=request)
+        except BaseException:
+            # The update never reached a background task, give the slot back
+            self._slots.release()
+            raise
+
+    async def _background_feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot=bot, update=update)
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        if self._background_feed_update_tasks:
+            logger.info(f"Waiting for {len(self._background_feed_update_tasks)} in-flight updates")
+            await asyncio.gather(*self._background_feed_update_tasks, return_exceptions=True)
+        await super().close()
@@ -1,12 +1,73 @@
+import asyncio
+from datetime import date, datetime, UTC
+
 import typer
 
+from bot.container import Container
+from bot.database.connection import long_operation_db
+from bot.database.partitions import LedgerPartitionManager
+from bot.services.daily_bonus import BonusProgress
 from bot.main import start_bot
+from bot.settings import settings
 
 cli = typer.Typer()
 
 @cli.command()
-def start() -> None:
-    start_bot()
+def start(
+    webhook: bool = typer.Option(False, "--webhook", help="Serve updates via webhook instead of long polling."),
+) -> None:
+    start_bot(webhook=webhook)
+
+@cli.command()
+def ledger_partitions(
+    ahead: int = typer.Option(settings.LEDGER.PARTITIONS_AHEAD, "--ahead", help="Months to create ahead of the current one."),
+) -> None:
+    """Create upcoming monthly ledger partitions. Run at least monthly."""
+    async def run() -> list:
+        try:
+            return await LedgerPartitionManager(long_operation_db).ensure_partitions(ahead)
+        finally:
+            await long_operation_db.engine.dispose()
+
+    created = asyncio.run(run())
+    typer.echo(f"Created partitions: {', '.join(f'{m:%Y-%m}' for m in created) or 'none'}")
+
+@cli.command()
+def compact_ledger(
+    older_than: int = typer.Option(settings.LEDGER.RETENTION_MONTHS, "--older-than", help="Keep this many months of detail."),
+) -> None:
+    """Fold old ledger months into ledger_monthly_rollup and drop their partitions."""
+    async def run() -> list:
+        try:
+            return await LedgerPartitionManager(long_operation_db).compact(older_than)
+        finally:
+            await long_operation_db.engine.dispose()
+
+    for month in asyncio.run(run()):
+        typer.echo(f"{month.month:%Y-%m}: {month.entries} entries -> {month.rollup_rows} rollup rows")
+
+@cli.command()
+def daily_bonus(
+    day: datetime | None = typer.Option(None, "--day", formats=["%Y-%m-%d"], help="Bonus day, today (UTC) by default."),
+) -> None:
+    """Grant the daily bonus to all users. Safe to re-run; resumes an interrupted run."""
+    bonus_day: date = day.date() if day else datetime.now(UTC).date()
+    container = Container()
+
+    def report(progress: BonusProgress) -> None:
+        typer.echo(
+            f"{progress.key}: ids < {progress.cursor} of {progress.last_id}, "
+            f"{progress.granted} granted, {progress.rate:.0f} rows/s"
+        )
+
+    async def run() -> BonusProgress:
+        try:
+            return await container.daily_bonus_job().run(bonus_day, on_progress=report)
+        finally:
+            await container.db().engine.dispose()
+
+    progress = asyncio.run(run())
+    typer.echo(f"{progress.key} done: {progress.granted} users")
 
 @cli.command()
 def dummy() -> None: